@@ -8,7 +8,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from app.models.user_model import Base  # adjust if needed
-from app.configsettings.config import settings  # <-- NEW
+from app.settings.config import settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,38 @@
+"""Add row_counts table with trigger-maintained users count
+
+Revision ID: 3e7b5c0a1f92
+Revises: 8c1f2a6d9e41
+Create Date: 2026-10-18 10:03:54.118270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.row_count_model import USERS_ROW_COUNT_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7b5c0a1f92'
+down_revision: Union[str, None] = '8c1f2a6d9e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('row_counts',
+    sa.Column('table_name', sa.String(length=63), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    # Seeds the users count, then installs the insert/delete triggers
+    for ddl in USERS_ROW_COUNT_DDL:
+        op.execute(ddl)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS users_row_count_delete ON users')
+    op.execute('DROP TRIGGER IF EXISTS users_row_count_insert ON users')
+    op.execute('DROP FUNCTION IF EXISTS users_row_count()')
+    op.drop_table('row_counts')
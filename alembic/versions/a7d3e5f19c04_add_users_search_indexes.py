@@ -0,0 +1,57 @@
+"""Add trigram and full-text search indexes on users
+
+Revision ID: a7d3e5f19c04
+Revises: f0c3a9d27b61
+Create Date: 2026-10-18 15:02:44.871305
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5f19c04'
+down_revision: Union[str, None] = 'f0c3a9d27b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('email', 'nickname', 'first_name', 'last_name')
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def trigram_available() -> bool:
+    """Whether the server ships pg_trgm (part of contrib); offline SQL always includes it."""
+    if op.get_context().as_sql:
+        return True
+    return op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')")
+    ).scalar()
+
+
+def upgrade() -> None:
+    # Without pg_trgm, search falls back to substring and full-text matching; to add fuzzy
+    # matching later, install contrib, then downgrade to f0c3a9d27b61 and upgrade again
+    if trigram_available():
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(
+                f'ix_users_{column}_trgm', 'users', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+            )
+    else:
+        logger.warning('pg_trgm is not available on this server; skipping the trigram search indexes')
+    op.create_index(
+        'ix_users_search_document', 'users',
+        [sa.text("to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || nickname)")],
+        unique=False, postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_search_document', table_name='users')
+    for column in reversed(TRIGRAM_COLUMNS):
+        op.execute(f'DROP INDEX IF EXISTS ix_users_{column}_trgm')
@@ -0,0 +1,35 @@
+"""Add users indexes for filtered listings
+
+Revision ID: c2e8b4a61d37
+Revises: a7d3e5f19c04
+Create Date: 2026-10-18 16:21:07.553190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e8b4a61d37'
+down_revision: Union[str, None] = 'a7d3e5f19c04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_role_created_at_id', 'users', ['role', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_unverified_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('email_verified = false'))
+    op.create_index('ix_users_locked_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('is_locked = true'))
+    op.create_index('ix_users_professional_created_at_id', 'users', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('is_professional = true'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_professional_created_at_id', table_name='users')
+    op.drop_index('ix_users_locked_created_at_id', table_name='users')
+    op.drop_index('ix_users_unverified_created_at_id', table_name='users')
+    op.drop_index('ix_users_role_created_at_id', table_name='users')
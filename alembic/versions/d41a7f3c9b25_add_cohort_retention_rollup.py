@@ -0,0 +1,51 @@
+"""Add cohort_retention rollup table
+
+Revision ID: d41a7f3c9b25
+Revises: b52d0e7c4a18
+Create Date: 2026-10-18 13:02:41.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7f3c9b25'
+down_revision: Union[str, None] = 'b52d0e7c4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('cohort_retention',
+    sa.Column('cohort_week', sa.Date(), nullable=False),
+    sa.Column('week_offset', sa.Integer(), nullable=False),
+    sa.Column('active_users', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('cohort_week', 'week_offset')
+    )
+    # Seed from existing users: signups, plus the week of each user's last login
+    # (earlier activity was never recorded)
+    op.execute(
+        """
+        INSERT INTO cohort_retention (cohort_week, week_offset, active_users)
+        SELECT cohort_week, week_offset, count(*)
+        FROM (
+            SELECT date_trunc('week', created_at AT TIME ZONE 'UTC')::date AS cohort_week, 0 AS week_offset
+            FROM users WHERE created_at IS NOT NULL
+            UNION ALL
+            SELECT date_trunc('week', created_at AT TIME ZONE 'UTC')::date,
+                   (date_trunc('week', last_login_at AT TIME ZONE 'UTC')::date
+                    - date_trunc('week', created_at AT TIME ZONE 'UTC')::date) / 7
+            FROM users
+            WHERE created_at IS NOT NULL AND last_login_at IS NOT NULL
+              AND date_trunc('week', last_login_at AT TIME ZONE 'UTC') > date_trunc('week', created_at AT TIME ZONE 'UTC')
+        ) AS activity
+        GROUP BY cohort_week, week_offset
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cohort_retention')
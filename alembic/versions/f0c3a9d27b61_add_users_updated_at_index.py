@@ -0,0 +1,26 @@
+"""Add users updated_at index for incremental exports
+
+Revision ID: f0c3a9d27b61
+Revises: d41a7f3c9b25
+Create Date: 2026-10-18 13:48:09.224517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0c3a9d27b61'
+down_revision: Union[str, None] = 'd41a7f3c9b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_updated_at', 'users', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_updated_at', table_name='users')
@@ -1,23 +1,95 @@
+from builtins import bool, dict, int, round, sorted, sum
+from datetime import date, datetime, time, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from app.models.cohort_retention_model import CohortRetention
 from app.models.user_model import User
 
-async def get_user_retention(db: AsyncSession):
-    # Total number of users (signups)
-    total_signups_result = await db.execute(select(func.count()).select_from(User))
-    total_signups = total_signups_result.scalar()
+def week_start(moment: datetime) -> date:
+    """Monday (UTC) of the week containing ``moment``."""
+    day = moment.astimezone(timezone.utc).date()
+    return day - timedelta(days=day.weekday())
 
-    # Returning users = users whose updated_at is different from created_at
-    returning_users_result = await db.execute(
-        select(func.count()).select_from(User).where(User.updated_at != User.created_at)
+async def _increment(db: AsyncSession, cohort_week: date, week_offset: int, amount: int = 1):
+    statement = insert(CohortRetention).values(cohort_week=cohort_week, week_offset=week_offset, active_users=amount)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[CohortRetention.cohort_week, CohortRetention.week_offset],
+        set_={"active_users": CohortRetention.active_users + amount},
+    ))
+
+async def record_signup(db: AsyncSession, created_at: datetime, count: int = 1):
+    """Count ``count`` new users in their cohort; runs in the caller's transaction."""
+    await _increment(db, week_start(created_at), 0, count)
+
+def count_signups_from(rows, created_at: datetime):
+    """Upsert counting one signup per row of ``rows``, e.g. an ``INSERT ... RETURNING`` CTE."""
+    statement = insert(CohortRetention).from_select(
+        ["cohort_week", "week_offset", "active_users"],
+        select(literal(week_start(created_at)), literal(0), func.count()).select_from(rows).having(func.count() > 0),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[CohortRetention.cohort_week, CohortRetention.week_offset],
+        set_={"active_users": CohortRetention.active_users + statement.excluded.active_users},
     )
-    returning_users = returning_users_result.scalar()
 
-    # Calculate retention rate
-    retention_rate = (returning_users / total_signups) * 100 if total_signups > 0 else 0
+async def record_activity(db: AsyncSession, user_id, created_at: datetime, now: datetime) -> bool:
+    """
+    Set the user's ``last_login_at`` to ``now`` and count it as active in the current week,
+    unless it already was; returns whether it was counted.
+
+    The check and the stamp are one conditional UPDATE, so of several concurrent logins in a
+    new week only the one whose UPDATE returns the row counts it; the others wait on its row
+    lock and then find ``last_login_at`` already in this week.
+    """
+    current_week = week_start(now)
+    stamped = await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .where(or_(User.last_login_at.is_(None), User.last_login_at < datetime.combine(current_week, time.min, timezone.utc)))
+        .values(last_login_at=now)
+        .returning(User.id)
+    )
+    if stamped.first() is None:
+        await db.execute(update(User).where(User.id == user_id).values(last_login_at=now))
+        return False
+    cohort_week = week_start(created_at)
+    # Week 0 was counted at signup
+    if current_week <= cohort_week:
+        return False
+    await _increment(db, cohort_week, (current_week - cohort_week).days // 7)
+    return True
+
+async def get_user_retention(db: AsyncSession, cohorts: int = 12):
+    """Weekly retention for the most recent ``cohorts`` signup weeks, read from the rollup table."""
+    since = week_start(datetime.now(timezone.utc)) - timedelta(weeks=cohorts - 1)
+    result = await db.execute(
+        select(CohortRetention)
+        .where(CohortRetention.cohort_week >= since)
+        .order_by(CohortRetention.cohort_week, CohortRetention.week_offset)
+    )
+
+    by_cohort = {}
+    for row in result.scalars():
+        by_cohort.setdefault(row.cohort_week, {})[row.week_offset] = row.active_users
+
+    report = []
+    for cohort_week, weeks in by_cohort.items():
+        signups = weeks.get(0, 0)
+        report.append({
+            "cohort_week": cohort_week.isoformat(),
+            "signups": signups,
+            "retention": [
+                {
+                    "week": week_offset,
+                    "active_users": active_users,
+                    "retention_rate": round(active_users / signups * 100, 2) if signups > 0 else 0,
+                }
+                for week_offset, active_users in sorted(weeks.items())
+            ],
+        })
 
     return {
-        "total_signups": total_signups,
-        "returning_users": returning_users,
-        "retention_rate": round(retention_rate, 2)
+        "total_signups": sum(cohort["signups"] for cohort in report),
+        "cohorts": report,
     }
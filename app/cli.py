@@ -0,0 +1,85 @@
+"""
+Operational commands, run as ``python -m app.cli <command>``.
+
+    migrate           create the schema, or upgrade it, to the latest migration
+    check             exit non-zero unless the database is at the latest migration
+    startup-profile   print how long importing the application takes, per module
+"""
+from builtins import int, len, list, next, print, sorted, str
+import argparse
+import asyncio
+import subprocess
+import sys
+from app.database import Database
+from app.schema_version import SchemaVersionError, alembic_config, check_schema_version
+from app.settings.config import get_settings
+
+def migrate(args) -> int:
+    from alembic import command
+
+    command.upgrade(alembic_config(), args.revision)
+    return 0
+
+async def _check() -> int:
+    Database.initialize(get_settings().database_url)
+    try:
+        async with Database._engine.connect() as conn:
+            await check_schema_version(conn, "error")
+    except SchemaVersionError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        await Database._engine.dispose()
+    print("Database schema is up to date.")
+    return 0
+
+def check(args) -> int:
+    return asyncio.run(_check())
+
+def profile_imports(module: str = "app.main") -> list:
+    """
+    Import ``module`` in a fresh interpreter under ``-X importtime``; returns
+    ``(module, self_us, cumulative_us)`` for every module that import loaded, in import
+    order, leaving out what the interpreter loads at startup.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Top-level imports are indented by one space; the last one is ``module`` itself
+        if name.startswith("  "):
+            timings.append((name.strip(), int(self_us), int(cumulative_us)))
+        else:
+            timings = [] if name.strip() != module else timings + [(module, int(self_us), int(cumulative_us))]
+    return timings
+
+def startup_profile(args) -> int:
+    timings = profile_imports(args.module)
+    total = next((cumulative for name, _, cumulative in timings if name == args.module), 0)
+    print(f"Importing {args.module} took {total / 1000:.1f} ms across {len(timings)} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(timings, key=lambda timing: timing[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+    return 0
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="User management service commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = commands.add_parser("migrate", help="Create or upgrade the database schema with Alembic.")
+    migrate_parser.add_argument("revision", nargs="?", default="head", help="Target revision (default: head).")
+    migrate_parser.set_defaults(handler=migrate)
+    check_parser = commands.add_parser("check", help="Verify the database is at the latest migration.")
+    check_parser.set_defaults(handler=check)
+    profile_parser = commands.add_parser("startup-profile", help="Show per-module import time of the application.")
+    profile_parser.add_argument("--module", default="app.main", help="Module to import (default: app.main).")
+    profile_parser.add_argument("--top", type=int, default=30, help="Number of slowest modules to list.")
+    profile_parser.set_defaults(handler=startup_profile)
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,105 @@
+from builtins import ValueError, bool, dict, float, int, len, list, max, min, round, str
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 Base = declarative_base()
 
+# Checkout waits for the current request, when one is being tracked
+_request_checkouts: ContextVar = ContextVar("request_checkouts", default=None)
+
+class CheckoutMetrics:
+    """Running statistics for how long requests wait to get a pooled connection."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def stats(self) -> dict:
+        return {
+            "checkouts": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_wait_ms": round(self.max * 1000, 3),
+            "last_wait_ms": round(self.last * 1000, 3),
+        }
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            Database.checkout_metrics.record(elapsed)
+            waits = _request_checkouts.get()
+            if waits is not None:
+                waits.append(elapsed)
+
 class Database:
     """Handles database connections and sessions."""
     _engine = None
     _session_factory = None
+    _replicas = []  # (engine, session factory) per read replica
+    _replica_selection = "round_robin"
+    _next_replica = 0
+    checkout_metrics = CheckoutMetrics()
+
+    @staticmethod
+    def _create_engine(database_url: str, echo: bool = False, pool_size: int = 5, max_overflow: int = 10,
+                       pool_timeout: float = 30.0, pool_recycle: int = 1800, pool_pre_ping: bool = True,
+                       statement_cache_size: int = 100, replica: bool = False):
+        engine = create_async_engine(
+            database_url,
+            echo=echo,
+            future=True,
+            poolclass=TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            connect_args={"prepared_statement_cache_size": statement_cache_size},
+        )
+        # Replica sessions are marked so caches can tell their possibly lagging reads apart
+        session_factory = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False, future=True, info={"replica": replica}
+        )
+        return engine, session_factory
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
+    def initialize(cls, database_url: str, echo: bool = False, **pool_options):
         """Initialize the async engine and sessionmaker."""
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
-            cls._session_factory = sessionmaker(
-                bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
-            )
+            cls._engine, cls._session_factory = cls._create_engine(database_url, echo, **pool_options)
+
+    @classmethod
+    def initialize_replicas(cls, replica_urls: list, selection: str = "round_robin", echo: bool = False, **pool_options):
+        """Create an engine per read replica; ``selection`` is ``round_robin`` or ``least_connections``."""
+        if selection not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica selection: {selection}")
+        if not cls._replicas:
+            cls._replicas = [cls._create_engine(url, echo, replica=True, **pool_options) for url in replica_urls]
+            cls._replica_selection = selection
+            cls._next_replica = 0
+
+    @classmethod
+    async def dispose_replicas(cls):
+        replicas, cls._replicas = cls._replicas, []
+        for engine, _ in replicas:
+            await engine.dispose()
 
     @classmethod
     def get_session_factory(cls):
@@ -23,3 +107,66 @@ class Database:
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
         return cls._session_factory
+
+    @classmethod
+    def get_read_session_factory(cls):
+        """Returns a session factory for a read replica, or the primary's when no replicas are configured."""
+        if not cls._replicas:
+            return cls.get_session_factory()
+        if cls._replica_selection == "least_connections":
+            _, session_factory = min(cls._replicas, key=lambda replica: replica[0].pool.checkedout())
+        else:
+            _, session_factory = cls._replicas[cls._next_replica % len(cls._replicas)]
+            cls._next_replica += 1
+        return session_factory
+
+    @staticmethod
+    def track_checkouts() -> list:
+        """Start collecting checkout waits for the current request; returns the list they are appended to."""
+        waits = []
+        _request_checkouts.set(waits)
+        return waits
+
+    @staticmethod
+    def _pool_status(engine) -> dict:
+        pool = engine.pool
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        }
+
+    @classmethod
+    def pool_status(cls) -> dict:
+        """Report connection pool occupancy."""
+        if cls._engine is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        return cls._pool_status(cls._engine)
+
+    @classmethod
+    def replica_pool_status(cls) -> list:
+        """Report connection pool occupancy for each read replica."""
+        return [cls._pool_status(engine) for engine, _ in cls._replicas]
+
+
+# Sessions note when they commit writes so callers can route follow-up reads to the primary
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _notify_write_commit(session):
+    if session.info.pop("wrote", False):
+        callback = session.info.get("on_write_commit")
+        if callback is not None:
+            callback()
+
+@event.listens_for(Session, "after_rollback")
+def _clear_write(session):
+    session.info.pop("wrote", None)
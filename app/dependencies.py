@@ -1,31 +1,81 @@
-from builtins import Exception, dict, str
-from fastapi import Depends, HTTPException
+from builtins import Exception, dict, round, str, sum
+from contextlib import asynccontextmanager
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import Database
-from app.utils.template_manager import TemplateManager
+from app.utils.template_manager import get_template_manager
 from app.services.email_service import EmailService
-from app.services.jwt_service import decode_token
-from app.settings.config import Settings
+from app.services.jwt_service import decode_token_cached
+from app.settings.config import get_settings, settings
 from fastapi import Depends
-
-def get_settings() -> Settings:
-    """Return application settings."""
-    return Settings()
+from starlette.datastructures import MutableHeaders
 
 def get_email_service() -> EmailService:
-    template_manager = TemplateManager()
-    return EmailService(template_manager=template_manager)
+    return EmailService(template_manager=get_template_manager())
 
-async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
-    async_session_factory = Database.get_session_factory()
-    async with async_session_factory() as session:
+READ_PRIMARY_COOKIE = "read_primary"
+
+@asynccontextmanager
+async def _request_session(session_factory, request: Request):
+    async with session_factory() as session:
+        waits = Database.track_checkouts()
         try:
             yield session
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
-        
+        finally:
+            # A request may open more than one session (e.g. a write and a replica read)
+            request.state.db_checkout_ms = round(getattr(request.state, "db_checkout_ms", 0.0) + sum(waits) * 1000, 3)
+
+async def get_db(request: Request) -> AsyncSession:
+    """Dependency that provides a database session for each request."""
+    async with _request_session(Database.get_session_factory(), request) as session:
+        # Once a write commits, keep this client's reads on the primary until replicas catch up;
+        # DatabaseResponseMiddleware sets the cookie on whatever response the endpoint returns
+        session.info["on_write_commit"] = lambda: setattr(request.state, "read_primary", True)
+        yield session
+
+async def get_read_db(request: Request) -> AsyncSession:
+    """Dependency that provides a session on a read replica, or on the primary right after the client wrote."""
+    if request.cookies.get(READ_PRIMARY_COOKIE):
+        session_factory = Database.get_session_factory()
+    else:
+        session_factory = Database.get_read_session_factory()
+    async with _request_session(session_factory, request) as session:
+        yield session
+
+class DatabaseResponseMiddleware:
+    """
+    ASGI middleware that reports what a request's database sessions did in its response headers:
+    the read-your-writes cookie after a write committed, and a ``Server-Timing: db-checkout``
+    entry with the time spent waiting for pooled connections, for sizing the pools.
+
+    Endpoints may build their own ``Response`` (a 204, a ``JSONResponse``), which drops headers
+    set on the injected one, so both are added here when the response starts instead.
+    ``get_db`` and ``get_read_db`` have closed their sessions, and recorded both, by then.
+    """
+
+    def __init__(self, app, read_primary_seconds: int):
+        self.app = app
+        self.cookie = f"{READ_PRIMARY_COOKIE}=1; HttpOnly; Max-Age={read_primary_seconds}; Path=/; SameSite=lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if state.get("read_primary"):
+                    headers.append("set-cookie", self.cookie)
+                if "db_checkout_ms" in state:
+                    headers.append("server-timing", f"db-checkout;dur={state['db_checkout_ms']}")
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
@@ -35,7 +85,7 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     if payload is None:
         raise credentials_exception
     user_id: str = payload.get("sub")
@@ -1,14 +1,25 @@
 from builtins import Exception
+import asyncio
 from fastapi import FastAPI
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from app.database import Database
-from app.dependencies import get_settings
+from app.dependencies import DatabaseResponseMiddleware, get_settings
 from app.routers import user_routes
 from app.routers.analytics_routes import router as analytics_router
+from app.routers.health_routes import router as health_router
+from app.schema_version import check_schema_version
+from app.services.email_outbox import OutboxWorker
+from app.services.email_service import EmailService
+from app.services.nickname_allocator import nickname_allocator
+from app.services.user_autocomplete import user_autocomplete
 from app.utils.api_description import getDescription
-from app.models import user_model
+from app.utils.hashing_executor import HashingQueueFull, get_hashing_executor
+from app.utils.rate_limiter import RateLimit, RateLimitMiddleware, RateLimitRule, rate_limit_store
+from app.utils.security import calibrate_bcrypt_rounds, set_bcrypt_rounds
+
+settings = get_settings()
 
 app = FastAPI(
     title="User Management",
@@ -25,6 +36,34 @@ app = FastAPI(
 # Routers correctly included
 app.include_router(user_routes.router)
 app.include_router(analytics_router)
+app.include_router(health_router)
+
+def _rate_limit(limit: int, period: float):
+    return RateLimit(limit, period) if limit > 0 else None
+
+# Rate limiting runs before routing, so rejected requests never reach the database or bcrypt
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules={
+            "/login/": RateLimitRule(
+                per_ip=_rate_limit(settings.rate_limit_login_per_ip, settings.rate_limit_period),
+                per_account=_rate_limit(settings.rate_limit_login_per_account, settings.rate_limit_period),
+                account_field="username",
+            ),
+            "/register/": RateLimitRule(
+                per_ip=_rate_limit(settings.rate_limit_register_per_ip, settings.rate_limit_period),
+                per_account=_rate_limit(settings.rate_limit_register_per_account, settings.rate_limit_period),
+                account_field="email",
+            ),
+        },
+        store=rate_limit_store,
+        trust_forwarded=settings.rate_limit_trust_forwarded,
+        max_body=settings.rate_limit_max_body,
+    )
+
+# Adds the read-your-writes cookie and connection checkout timing to every response
+app.add_middleware(DatabaseResponseMiddleware, read_primary_seconds=settings.read_your_writes_seconds)
 
 # CORS middleware
 app.add_middleware(
@@ -35,12 +74,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(HashingQueueFull)
+async def hashing_queue_full_handler(request, exc):
+    # Shed load instead of letting password work queue without limit
+    return JSONResponse(status_code=503, content={"detail": "Server is busy, please retry."}, headers={"Retry-After": "1"})
+
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(
+        settings.database_url,
+        settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        statement_cache_size=settings.db_statement_cache_size,
+    )
+    if settings.database_replica_urls:
+        Database.initialize_replicas(
+            [url.strip() for url in settings.database_replica_urls.split(",") if url.strip()],
+            settings.replica_selection,
+            settings.debug,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            statement_cache_size=settings.db_statement_cache_size,
+        )
+
+    # One query against alembic_version instead of inspecting every table; the schema itself
+    # is created and upgraded by `python -m app.cli migrate`
+    if settings.schema_check != "off":
+        async with Database._engine.connect() as conn:
+            await check_schema_version(conn, settings.schema_check)
+
+    if settings.nickname_filter_warm:
+        async with Database.get_read_session_factory()() as session:
+            await nickname_allocator.warm(session)
+    if settings.autocomplete_enabled:
+        # Loads in the background; /users/autocomplete queries the database until it is ready
+        app.state.autocomplete_load = asyncio.create_task(user_autocomplete.load(Database.get_read_session_factory()))
+
+    get_hashing_executor().start()
+    if settings.bcrypt_calibrate:
+        rounds = await get_hashing_executor().run(
+            calibrate_bcrypt_rounds, settings.bcrypt_target_ms, settings.bcrypt_min_rounds, settings.bcrypt_max_rounds
+        )
+        set_bcrypt_rounds(rounds)
+
+    if settings.outbox_worker_enabled:
+        app.state.outbox_worker = OutboxWorker(EmailService())
+        app.state.outbox_worker.start()
 
-    async with Database._engine.begin() as conn:
-        await conn.run_sync(user_model.Base.metadata.create_all)
+@app.on_event("shutdown")
+async def shutdown_event():
+    outbox_worker = getattr(app.state, "outbox_worker", None)
+    if outbox_worker is not None:
+        await outbox_worker.stop()
+    autocomplete_load = getattr(app.state, "autocomplete_load", None)
+    if autocomplete_load is not None:
+        autocomplete_load.cancel()
+    get_hashing_executor().shutdown()
+    await Database.dispose_replicas()
 
 # Global exception handler (optional - currently commented out)
@@ -0,0 +1,23 @@
+from builtins import int
+from datetime import date
+from sqlalchemy import Column, Date, Integer
+from sqlalchemy.orm import Mapped
+from app.database import Base
+
+class CohortRetention(Base):
+    """
+    Weekly signup-cohort activity rollup, updated as users register and log in.
+
+    Each row counts the users from one signup week who were active ``week_offset`` weeks
+    after it; offset 0 is the cohort size.
+
+    Attributes:
+        cohort_week (date): Monday (UTC) of the week the users signed up.
+        week_offset (int): Whole weeks between the cohort week and the activity week.
+        active_users (int): Users of the cohort active in that week.
+    """
+    __tablename__ = "cohort_retention"
+
+    cohort_week: Mapped[date] = Column(Date, primary_key=True)
+    week_offset: Mapped[int] = Column(Integer, primary_key=True)
+    active_users: Mapped[int] = Column(Integer, nullable=False, default=0)
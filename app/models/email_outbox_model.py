@@ -0,0 +1,54 @@
+from builtins import dict, int, str
+from datetime import datetime
+from enum import Enum
+import uuid
+from sqlalchemy import Column, DateTime, Enum as SQLAlchemyEnum, Index, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class OutboxStatus(Enum):
+    """Delivery state of an outbox message."""
+    PENDING = "PENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
+class EmailOutbox(Base):
+    """
+    An email waiting to be delivered, written in the same transaction as the change that
+    triggered it and drained by the outbox worker.
+
+    Attributes:
+        id (UUID): Unique identifier for the message.
+        recipient (str): Address the email is sent to.
+        email_type (str): Name of the email template to render.
+        context (dict): Values substituted into the template.
+        status (OutboxStatus): Whether the message is pending, sent or dead-lettered.
+        attempts (int): Number of failed delivery attempts so far.
+        next_attempt_at (datetime): Earliest time the worker may try to deliver the message.
+        last_error (str): Error from the most recent failed attempt.
+        created_at (datetime): Timestamp when the message was queued.
+        sent_at (datetime): Timestamp when the message was delivered.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The worker only ever scans pending rows that are due
+        Index("ix_email_outbox_pending", "next_attempt_at", postgresql_where="status = 'PENDING'"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    recipient: Mapped[str] = Column(String(255), nullable=False)
+    email_type: Mapped[str] = Column(String(50), nullable=False)
+    context: Mapped[dict] = Column(JSONB, nullable=False, default=dict)
+    status: Mapped[OutboxStatus] = Column(
+        SQLAlchemyEnum(OutboxStatus, name='OutboxStatus', create_constraint=True),
+        nullable=False, default=OutboxStatus.PENDING
+    )
+    attempts: Mapped[int] = Column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error: Mapped[str] = Column(String(500), nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox {self.email_type} to {self.recipient}, Status: {self.status.name}>"
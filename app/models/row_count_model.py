@@ -0,0 +1,57 @@
+from builtins import int, str
+from sqlalchemy import BigInteger, Column, DDL, String, event
+from sqlalchemy.orm import Mapped
+from app.database import Base
+
+class RowCount(Base):
+    """
+    Maintained row count for a table, kept current by statement-level triggers so that
+    listings can report a total without scanning the table.
+
+    Attributes:
+        table_name (str): Name of the counted table.
+        row_count (int): Number of rows currently in the table.
+    """
+    __tablename__ = "row_counts"
+
+    table_name: Mapped[str] = Column(String(63), primary_key=True)
+    row_count: Mapped[int] = Column(BigInteger, nullable=False, default=0)
+
+
+USERS_ROW_COUNT_DDL = [
+    DDL(
+        "INSERT INTO row_counts (table_name, row_count) "
+        "SELECT 'users', count(*) FROM users "
+        "WHERE NOT EXISTS (SELECT 1 FROM row_counts WHERE table_name = 'users') "
+        "ON CONFLICT (table_name) DO NOTHING"
+    ),
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION users_row_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE row_counts SET row_count = row_count + (SELECT count(*) FROM inserted)
+                WHERE table_name = 'users';
+            ELSE
+                UPDATE row_counts SET row_count = row_count - (SELECT count(*) FROM deleted)
+                WHERE table_name = 'users';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    ),
+    DDL(
+        "CREATE OR REPLACE TRIGGER users_row_count_insert AFTER INSERT ON users "
+        "REFERENCING NEW TABLE AS inserted FOR EACH STATEMENT EXECUTE FUNCTION users_row_count()"
+    ),
+    DDL(
+        "CREATE OR REPLACE TRIGGER users_row_count_delete AFTER DELETE ON users "
+        "REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION users_row_count()"
+    ),
+]
+
+# Install the counter triggers whenever the schema is created from metadata;
+# after_create on the metadata runs once both tables exist. Every statement is idempotent.
+for ddl in USERS_ROW_COUNT_DDL:
+    event.listen(Base.metadata, "after_create", ddl.execute_if(dialect="postgresql"))
@@ -3,7 +3,7 @@ from datetime import datetime
 from enum import Enum
 import uuid
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Boolean, func, Enum as SQLAlchemyEnum
+    Column, String, Integer, DateTime, Boolean, Index, func, text, Enum as SQLAlchemyEnum
 )
 from sqlalchemy.dialects.postgresql import UUID, ENUM
 from sqlalchemy.orm import Mapped, mapped_column
@@ -52,6 +52,17 @@ class User(Base):
     """
     __tablename__ = "users"
     __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Keyset pagination sort key for listings
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Incremental exports filter on updated_at
+        Index("ix_users_updated_at", "updated_at"),
+        # Filtered listings, each in keyset order so a page is a single index range scan
+        Index("ix_users_role_created_at_id", "role", "created_at", "id"),
+        Index("ix_users_unverified_created_at_id", "created_at", "id", postgresql_where=text("email_verified = false")),
+        Index("ix_users_locked_created_at_id", "created_at", "id", postgresql_where=text("is_locked = true")),
+        Index("ix_users_professional_created_at_id", "created_at", "id", postgresql_where=text("is_professional = true")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     nickname: Mapped[str] = Column(String(50), unique=True, nullable=False, index=True)
@@ -96,3 +107,14 @@ class User(Base):
         """Updates the professional status and logs the update time."""
         self.is_professional = status
         self.professional_status_updated_at = func.now()
+
+
+# Full-text document searched by GET /users/search. Queries must repeat this exact expression,
+# with the constants inline rather than bound, for the planner to use the GIN index. The trigram
+# indexes for substring and fuzzy matching need pg_trgm and are created by migration only.
+USER_SEARCH_DOCUMENT = func.to_tsvector(
+    text("'simple'"),
+    func.coalesce(User.__table__.c.first_name, text("''")) + text("' '")
+    + func.coalesce(User.__table__.c.last_name, text("''")) + text("' '") + User.__table__.c.nickname,
+)
+Index("ix_users_search_document", USER_SEARCH_DOCUMENT, postgresql_using="gin")
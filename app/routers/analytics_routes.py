@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_db
+from app.dependencies import get_read_db
 from app.analytics.analytics_service import get_user_retention
 
 router = APIRouter(
@@ -8,7 +8,7 @@ router = APIRouter(
     tags=["analytics"]
 )
 
-@router.get("/retention", summary="Get user retention analytics")
-async def user_retention(db: AsyncSession = Depends(get_db)):
-    retention_data = await get_user_retention(db)
+@router.get("/retention", summary="Get weekly signup-cohort retention")
+async def user_retention(cohorts: int = Query(12, ge=1, le=104), db: AsyncSession = Depends(get_read_db)):
+    retention_data = await get_user_retention(db, cohorts)
     return retention_data
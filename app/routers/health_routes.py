@@ -0,0 +1,29 @@
+from builtins import Exception, str
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from app.database import Database
+from app.services.user_autocomplete import user_autocomplete
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"]
+)
+
+@router.get("/ready", summary="Readiness check with connection pool telemetry")
+async def readiness():
+    """Report whether the database answers, along with pool occupancy and checkout wait times."""
+    try:
+        async with Database.get_session_factory()() as session:
+            await session.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception as e:
+        database = f"unavailable: {e}"
+    body = {
+        "status": "ready" if database == "ok" else "unavailable",
+        "database": database,
+        "pool": {**Database.pool_status(), **Database.checkout_metrics.stats()},
+        "replicas": Database.replica_pool_status(),
+        "autocomplete": user_autocomplete.stats(),
+    }
+    return JSONResponse(status_code=200 if database == "ok" else 503, content=body)
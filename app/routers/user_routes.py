@@ -1,33 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Optional
 from app.services.jwt_service import create_access_token
-from app.services.email_service import get_email_service
-from app.services.user_service import UserService
+from app.database import Database
+from app.services.user_export import EXPORT_FORMATS, export_users, parse_fields
+from app.services.user_import import IMPORT_FORMATS, import_jobs, start_import
+from app.services.user_autocomplete import user_autocomplete
+from app.services.user_service import UserService, parse_user_fields
 from app.schemas.token_schemas import TokenResponse
-from app.schemas.user_schemas import UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate, PaginatedUserResponse
-from app.dependencies import get_db, oauth2_scheme, require_role
-from app.schemas.pagination_schema import generate_pagination_links
+from app.schemas.user_schemas import AutocompleteResponse, BulkOperationResponse, UserBase, UserBulkFilter, UserBulkUpdate, UserCreate, UserListFilter, UserListResponse, UserResponse, UserSort, UserUpdate, PaginatedUserResponse
+from app.dependencies import get_db, get_read_db, oauth2_scheme, require_role
+from app.schemas.pagination_schema import CountStrategy, generate_pagination_links
 from app.settings.config import get_settings
+from app.utils.etag import etag_matches, etag_version, modified_since, parse_etags, version_etag, version_headers
+from app.utils.security import needs_rehash
 
 router = APIRouter()
 settings = get_settings()
 
+def _user_fields(fields: Optional[str]) -> tuple:
+    try:
+        return parse_user_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _sparse(row, fields: tuple) -> dict:
+    return {name: getattr(row, name) for name in fields}
+
+def _page_response(paginated_response: dict, columns: tuple, fields: Optional[str]):
+    """Return a listing page as is, or with each item cut down to the requested sparse fieldset."""
+    if not fields:
+        return paginated_response
+    page = PaginatedUserResponse(**{**paginated_response, "items": []}).model_dump()
+    page["items"] = [_sparse(row, columns) for row in paginated_response["items"]]
+    return JSONResponse(jsonable_encoder(page))
+
+@router.get("/users/export", tags=["User Management Requires (Admin or Manager Roles)"])
+async def export_users_stream(format: str = "ndjson", fields: Optional[str] = None, updated_since: Optional[datetime] = None, updated_before: Optional[datetime] = None, token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
+    """Stream users as NDJSON or CSV, optionally limited to some columns and an updated_at window."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported export format: {format}")
+    try:
+        columns = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(
+        export_users(Database.get_read_session_factory(), format, columns, updated_since, updated_before),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+@router.get("/users/search", response_model=PaginatedUserResponse, tags=["User Management Requires (Admin or Manager Roles)"])
+async def search_users(q: str = Query(..., min_length=2, max_length=100), limit: int = Query(10, ge=1, le=100), cursor: Optional[str] = None, fields: Optional[str] = None, session: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+    """Find users by a fragment or misspelling of their email, nickname or name, best matches first."""
+    columns = _user_fields(fields)
+    try:
+        paginated_response = await UserService.search_users(session, q, limit, cursor, columns)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return _page_response(paginated_response, columns, fields)
+
+@router.get("/users/autocomplete", response_model=AutocompleteResponse, tags=["User Management Requires (Admin or Manager Roles)"])
+async def autocomplete_users(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=50), session: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+    """Type-ahead over nicknames and emails, answered from memory once the prefix index is loaded."""
+    if user_autocomplete.usable:
+        return {"items": user_autocomplete.suggest(q, limit), "source": "memory"}
+    page = await UserService.search_users(session, q, limit, fields=("nickname",))
+    return {"items": [{"id": row.id, "value": row.nickname} for row in page["items"]], "source": "database"}
+
 @router.get("/users/{user_id}", response_model=UserResponse, tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: str, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_user(user_id: str, request: Request, response: Response, fields: Optional[str] = None, session: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+    columns = _user_fields(fields)
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match or if_modified_since:
+        # Answer revalidations from updated_at alone, without loading or serializing the user
+        updated_at = await UserService.get_user_version(session, user_id)
+        if updated_at is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        if if_none_match:
+            not_modified = etag_matches(if_none_match, version_etag(updated_at), weak=True)
+        else:
+            not_modified = not modified_since(if_modified_since, updated_at)
+        if not_modified:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=version_headers(updated_at))
+
+    if fields:
+        # A sparse fieldset selects just those columns and skips the full-record cache
+        row = await UserService.get_user_fields(session, user_id, columns)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        headers = version_headers(row.updated_at) if row.updated_at is not None else None
+        return JSONResponse(jsonable_encoder(_sparse(row, columns)), headers=headers)
+
     user = await UserService.get_user_by_id(session, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if user.updated_at is not None:
+        response.headers.update(version_headers(user.updated_at))
     return UserResponse.from_orm(user)
 
 @router.put("/users/{user_id}", response_model=UserResponse, tags=["User Management Requires (Admin or Manager Roles)"])
-async def update_user(user_id: str, user_update: UserUpdate, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def update_user(user_id: str, user_update: UserUpdate, request: Request, response: Response, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     user_data = user_update.dict(exclude_unset=True)
-    updated_user = await UserService.update_user(session, user_id, user_data)
+    if_match = request.headers.get("if-match")
+    if if_match and if_match.strip() != "*":
+        versions = [version for version in map(etag_version, parse_etags(if_match)) if version is not None]
+        if not versions:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="User was modified by another request.")
+        updated_user = await UserService.update_user_if_unmodified(session, user_id, user_data, versions)
+    else:
+        updated_user = await UserService.update_user(session, user_id, user_data)
     if not updated_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    if updated_user.updated_at is not None:
+        response.headers.update(version_headers(updated_user.updated_at))
     return UserResponse.from_orm(updated_user)
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["User Management Requires (Admin or Manager Roles)"])
@@ -38,21 +130,66 @@ async def delete_user(user_id: str, session: AsyncSession = Depends(get_db), tok
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/users/", response_model=PaginatedUserResponse, tags=["User Management Requires (Admin or Manager Roles)"])
-async def list_users(request: Request, skip: int = 0, limit: int = 10, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
-    paginated_response = await UserService.list_users(session, skip, limit)
-    return paginated_response
+async def list_users(request: Request, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, count: Optional[CountStrategy] = None, fields: Optional[str] = None, sort: UserSort = UserSort.CREATED_AT, filters: UserListFilter = Depends(), session: AsyncSession = Depends(get_read_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+    columns = _user_fields(fields)
+    filter_values = filters.model_dump(exclude_none=True)
+    # Passing `cursor` (empty for the first page) switches to keyset pagination
+    if cursor is not None:
+        try:
+            paginated_response = await UserService.list_users_by_cursor(session, cursor, limit, columns, filter_values, sort.value)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    else:
+        paginated_response = await UserService.list_users(session, skip, limit, count, columns, filter_values, sort.value)
+    return _page_response(paginated_response, columns, fields)
 
 @router.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["User Management Requires (Admin or Manager Roles)"])
-async def create_user(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service=Depends(get_email_service), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
-    created_user = await UserService.create(session, user_data.dict(), email_service)
+async def create_user(user_data: UserCreate, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
+    created_user = await UserService.register_user(session, user_data.dict())
     if not created_user:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
     return UserResponse.from_orm(created_user)
 
+@router.post("/users/import", status_code=status.HTTP_202_ACCEPTED, tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_import_users(request: Request, response: Response, format: Optional[str] = None, token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Upload a CSV (with header row) or NDJSON body of users; the format defaults from the Content-Type.
+
+    The import runs in the background once the upload is received; poll the returned Location
+    for progress. Job status is kept by the worker process that accepted the upload.
+    """
+    if format is None:
+        format = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import format: {format}")
+    job = await start_import(Database.get_session_factory(), request.stream(), format)
+    response.headers["Location"] = str(request.url_for("bulk_import_status", job_id=str(job.id)))
+    return job.as_dict()
+
+@router.get("/users/import/{job_id}", tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_import_status(job_id: str, token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
+    job = import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found")
+    return job.as_dict()
+
+@router.post("/users/bulk/update", response_model=BulkOperationResponse, tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_update_users(bulk_update: UserBulkUpdate, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
+    affected = await UserService.bulk_update_users(
+        session, bulk_update.filter.model_dump(exclude_none=True), bulk_update.changes.model_dump(exclude_none=True)
+    )
+    return BulkOperationResponse(affected=affected)
+
+@router.post("/users/bulk/delete", response_model=BulkOperationResponse, tags=["User Management Requires (Admin or Manager Roles)"])
+async def bulk_delete_users(filters: UserBulkFilter, session: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN"]))):
+    affected = await UserService.bulk_delete_users(session, filters.model_dump(exclude_none=True))
+    return BulkOperationResponse(affected=affected)
+
 @router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
-async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service=Depends(get_email_service)):
+async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db)):
     try:
-        new_user = await UserService.register_user(session, user_data.dict(), email_service)
+        # The verification email is queued in the outbox and sent by the background worker
+        new_user = await UserService.register_user(session, user_data.dict())
         return UserResponse.from_orm(new_user)
     except IntegrityError:
         await session.rollback()
@@ -61,8 +198,10 @@ async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
+async def login(background_tasks: BackgroundTasks, form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
     user = await UserService.login_for_access_token(session, form_data.username, form_data.password)
+    if needs_rehash(user.hashed_password):
+        background_tasks.add_task(UserService.upgrade_password_hash, user.id, form_data.password, user.hashed_password)
 
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
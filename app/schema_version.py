@@ -0,0 +1,59 @@
+from builtins import RuntimeError, getattr, set, sorted, str
+from logging import getLogger
+from pathlib import Path
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+# SQLSTATE undefined_table
+UNDEFINED_TABLE = "42P01"
+
+class SchemaVersionError(RuntimeError):
+    """The database schema is not at the revision this code was written for."""
+
+def alembic_config():
+    """Alembic configuration for the project, usable from any working directory."""
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    return config
+
+def head_revisions() -> set:
+    """Head revision(s) of the migration scripts; read from local files, not the database."""
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+async def current_revisions(conn: AsyncConnection) -> set:
+    """Revision(s) recorded in ``alembic_version``; empty if migrations were never run."""
+    try:
+        result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+    except ProgrammingError as e:
+        # Only a missing table means "never migrated"; permission errors and the like propagate
+        if getattr(e.orig, "pgcode", None) != UNDEFINED_TABLE:
+            raise
+        return set()
+    return set(result.scalars())
+
+async def check_schema_version(conn: AsyncConnection, mode: str = "error") -> bool:
+    """
+    Compare ``alembic_version`` with the migration head in a single query.
+
+    On a mismatch ``mode`` "error" raises ``SchemaVersionError`` and "warn" logs a warning;
+    returns whether the versions matched.
+    """
+    current, heads = await current_revisions(conn), head_revisions()
+    if current == heads:
+        return True
+    message = (
+        f"Database schema is at {', '.join(sorted(current)) or 'no revision'} but the code expects "
+        f"{', '.join(sorted(heads))}; run `python -m app.cli migrate`."
+    )
+    if mode == "error":
+        raise SchemaVersionError(message)
+    logger.warning(message)
+    return False
@@ -1,10 +1,18 @@
 import re
 from datetime import datetime
+from enum import Enum
 from typing import List, Optional, Dict
 from uuid import UUID
 from pydantic import BaseModel, EmailStr, Field, HttpUrl, validator, conint
 from fastapi import Request
 
+class CountStrategy(str, Enum):
+    """How list endpoints compute the total number of items."""
+    EXACT = "exact"          # count(*) over the table
+    ESTIMATED = "estimated"  # planner statistics, no scan
+    COUNTER = "counter"      # trigger-maintained row count
+    NONE = "none"            # skip the total, report has_more only
+
 # Pagination Model
 class Pagination(BaseModel):
     page: int = Field(..., description="Current page number.")
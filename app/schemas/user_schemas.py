@@ -96,6 +96,51 @@ class UserListResponse(BaseModel):
     page: int = Field(..., example=1)
     size: int = Field(..., example=10)
 
+class AutocompleteSuggestion(BaseModel):
+    id: uuid.UUID = Field(..., example=uuid.uuid4())
+    value: str = Field(..., example="john_doe123")
+
+class AutocompleteResponse(BaseModel):
+    items: List[AutocompleteSuggestion]
+    source: str = Field(..., example="memory", description="memory when served from the prefix index, database while it is unavailable.")
+
+class UserSort(str, Enum):
+    """Orderings GET /users/ accepts; a leading "-" sorts descending. Ties break on id."""
+    CREATED_AT = "created_at"
+    CREATED_AT_DESC = "-created_at"
+    NICKNAME = "nickname"
+    NICKNAME_DESC = "-nickname"
+    EMAIL = "email"
+    EMAIL_DESC = "-email"
+
+class UserListFilter(BaseModel):
+    role: Optional[UserRole] = Field(None, example="MANAGER")
+    email_verified: Optional[bool] = Field(None, example=False)
+    is_locked: Optional[bool] = Field(None, example=None)
+    is_professional: Optional[bool] = Field(None, example=None)
+    created_after: Optional[datetime] = Field(None, description="Only users created at or after this time.")
+    created_before: Optional[datetime] = Field(None, description="Only users created before this time.")
+
+class UserBulkFilter(BaseModel):
+    ids: Optional[List[uuid.UUID]] = Field(None, example=[uuid.uuid4()])
+    role: Optional[UserRole] = Field(None, example="AUTHENTICATED")
+    email_verified: Optional[bool] = Field(None, example=False)
+    is_locked: Optional[bool] = Field(None, example=None)
+    is_professional: Optional[bool] = Field(None, example=None)
+
+class UserBulkChanges(BaseModel):
+    role: Optional[UserRole] = Field(None, example="MANAGER")
+    email_verified: Optional[bool] = Field(None, example=None)
+    is_locked: Optional[bool] = Field(None, example=None)
+    is_professional: Optional[bool] = Field(None, example=None)
+
+class UserBulkUpdate(BaseModel):
+    filter: UserBulkFilter
+    changes: UserBulkChanges
+
+class BulkOperationResponse(BaseModel):
+    affected: int = Field(..., example=10000)
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -105,6 +150,10 @@ class UserVerify(BaseModel):
 
 class PaginatedUserResponse(BaseModel):
     items: List[UserResponse]  # <-- FIXED: use UserResponse instead of UserRead
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
+    total_is_exact: Optional[bool] = Field(None, description="False when `total` is an estimate; null when no total was computed.")
+    has_more: Optional[bool] = Field(None, description="Whether another page follows this one.")
+    next_cursor: Optional[str] = Field(None, description="Opaque cursor for the following page (cursor mode only).")
+    prev_cursor: Optional[str] = Field(None, description="Opaque cursor for the preceding page (cursor mode only).")
@@ -0,0 +1,146 @@
+from builtins import Exception, dict, int, len, min, str, zip
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from sqlalchemy import insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.models.email_outbox_model import EmailOutbox, OutboxStatus
+from app.settings.config import get_settings
+
+logger = getLogger(__name__)
+settings = get_settings()
+
+def enqueue_email(db: AsyncSession, recipient: str, email_type: str, context: dict) -> EmailOutbox:
+    """
+    Add an email to the outbox as part of the caller's transaction.
+
+    Nothing is sent and nothing is committed here; the message becomes visible to the
+    worker when the caller commits, and disappears with it on rollback.
+    """
+    message = EmailOutbox(recipient=recipient, email_type=email_type, context={**context, "email": recipient})
+    db.add(message)
+    return message
+
+def enqueue_email_for(rows, recipient: str, email_type: str, context: dict):
+    """
+    INSERT statement queueing one email per row of ``rows``, typically an ``INSERT ... RETURNING``
+    CTE, so the message is only queued when that insert actually produced a row.
+    """
+    columns = EmailOutbox.__table__.c
+    return insert(EmailOutbox).from_select(
+        ["id", "recipient", "email_type", "context", "status", "attempts"],
+        select(
+            literal(uuid.uuid4(), columns.id.type),
+            literal(recipient, columns.recipient.type),
+            literal(email_type, columns.email_type.type),
+            literal({**context, "email": recipient}, columns.context.type),
+            literal(OutboxStatus.PENDING, columns.status.type),
+            literal(0, columns.attempts.type),
+        ).select_from(rows),
+    )
+
+class OutboxWorker:
+    """
+    Drains the email outbox in batches on a background task.
+
+    Each batch is claimed with ``FOR UPDATE SKIP LOCKED`` so several workers can run side
+    by side, and leased by pushing ``next_attempt_at`` out by ``lease_seconds``. The claim
+    is committed before anything is sent, so no transaction or pooled connection is held
+    during SMTP; if a worker dies mid-batch its messages become due again when the lease
+    expires. Failed deliveries are retried with exponential backoff and dead-lettered
+    after ``max_attempts``.
+    """
+
+    def __init__(self, email_service, batch_size: int = None, poll_interval: float = None,
+                 max_attempts: int = None, backoff_base: float = None, backoff_max: float = None,
+                 lease_seconds: float = None):
+        self.email_service = email_service
+        self.batch_size = settings.outbox_batch_size if batch_size is None else batch_size
+        self.poll_interval = settings.outbox_poll_interval if poll_interval is None else poll_interval
+        self.max_attempts = settings.outbox_max_attempts if max_attempts is None else max_attempts
+        self.backoff_base = settings.outbox_backoff_base if backoff_base is None else backoff_base
+        self.backoff_max = settings.outbox_backoff_max if backoff_max is None else backoff_max
+        self.lease_seconds = settings.outbox_lease_seconds if lease_seconds is None else lease_seconds
+        self._task = None
+
+    def backoff(self, attempts: int) -> timedelta:
+        """Delay before the next attempt after ``attempts`` failures."""
+        return timedelta(seconds=min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max))
+
+    async def _deliver(self, message: EmailOutbox) -> dict:
+        """Send one message and return the column values recording the outcome."""
+        try:
+            await self.email_service.send_user_email(message.context, message.email_type)
+        except Exception as e:
+            attempts = message.attempts + 1
+            outcome = {"attempts": attempts, "last_error": str(e)[:500]}
+            if attempts >= self.max_attempts:
+                outcome["status"] = OutboxStatus.DEAD
+                logger.error("Dead-lettered %s email to %s: %s", message.email_type, message.recipient, e)
+            else:
+                outcome["next_attempt_at"] = datetime.now(timezone.utc) + self.backoff(attempts)
+            return outcome
+        return {"status": OutboxStatus.SENT, "sent_at": datetime.now(timezone.utc)}
+
+    async def run_once(self) -> int:
+        """Deliver one batch of due messages and return how many were claimed."""
+        session_factory = Database.get_session_factory()
+        async with session_factory() as db:
+            now = datetime.now(timezone.utc)
+            result = await db.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == OutboxStatus.PENDING, EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            messages = result.scalars().all()
+            if not messages:
+                return 0
+            lease_until = now + timedelta(seconds=self.lease_seconds)
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([message.id for message in messages]))
+                .values(next_attempt_at=lease_until)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+        outcomes = await asyncio.gather(*(self._deliver(message) for message in messages))
+
+        async with session_factory() as db:
+            for message, outcome in zip(messages, outcomes):
+                # Only while the lease is still ours; after it expired another worker may own the row
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == message.id, EmailOutbox.next_attempt_at == lease_until)
+                    .values(**outcome)
+                )
+            await db.commit()
+        return len(messages)
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error("Outbox batch failed: %s", e)
+                claimed = 0
+            # Keep draining while full batches come back; otherwise wait for new work
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,12 +1,34 @@
 from fastapi import BackgroundTasks
 from pydantic import EmailStr
 from app.settings.config import get_settings
+from app.utils.smtp_connection import SMTPClient
+from app.utils.template_manager import TemplateManager, get_template_manager
 
 settings = get_settings()
 
 class EmailService:
-    def __init__(self):
+    def __init__(self, template_manager: TemplateManager = None, smtp_client: SMTPClient = None):
         self.settings = get_settings()
+        self.template_manager = template_manager or get_template_manager()
+        self.smtp_client = smtp_client or SMTPClient(
+            server=settings.smtp_server,
+            port=settings.smtp_port,
+            username=settings.smtp_username,
+            password=settings.smtp_password,
+        )
+        self.subject_map = {
+            'email_verification': "Verify Your Account",
+            'test_email': "Test Email",
+        }
+
+    async def send_user_email(self, user_data: dict, email_type: str):
+        """Render the template for ``email_type`` with ``user_data`` and send it to ``user_data['email']``."""
+        subject = self.subject_map.get(email_type, "Notification")
+        html_content = self.template_manager.render_template(email_type, **user_data)
+        if self.settings.send_real_mail:
+            await self.smtp_client.send_email(subject, html_content, user_data['email'])
+        else:
+            print(f"{subject} email sent to {user_data['email']}")
 
     async def send_verification_email(self, email: EmailStr, token: str):
         # Simulate sending an email (for now)
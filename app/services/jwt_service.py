@@ -1,10 +1,16 @@
 # app/services/jwt_service.py
 from builtins import dict, str
-import jwt
+import hashlib
 from datetime import datetime, timedelta
 from app.settings.config import settings
+from app.utils.cache import TTLCache
+
+# Claims of recently verified tokens, keyed by a digest of the token
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl)
 
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
+    import jwt  # deferred to first use to keep application import fast
+
     to_encode = data.copy()
     # Convert role to uppercase before encoding the JWT
     if 'role' in to_encode:
@@ -15,8 +21,23 @@ def create_access_token(*, data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 def decode_token(token: str):
+    import jwt
+
     try:
         decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
         return decoded
     except jwt.PyJWTError:
         return None
+
+def decode_token_cached(token: str):
+    """
+    Like ``decode_token`` but serves repeat tokens from ``token_cache``, skipping the
+    signature check. Entries never outlive the token's own ``exp``; failures are not cached.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is not None:
+            token_cache.set(key, payload, expires_at=payload.get("exp"))
+    return payload
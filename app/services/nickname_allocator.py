@@ -0,0 +1,65 @@
+from builtins import frozenset, list, next, set, str, zip
+import secrets
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User
+from app.settings.config import get_settings
+from app.utils.bloom_filter import BloomFilter
+from app.utils.nickname_generator import generate_nickname, nickname_candidates
+
+settings = get_settings()
+
+class NicknameAllocator:
+    """
+    Picks free nicknames for new users with one batched lookup.
+
+    Several candidates are proposed per email and checked against the users table in a single
+    query. A Bloom filter of nicknames known to be taken lets most taken candidates be skipped
+    without asking the database; a false positive only discards a candidate that was free.
+    """
+
+    def __init__(self, taken: BloomFilter, candidates: int = 8):
+        self.taken = taken
+        self.candidates = candidates
+
+    def mark_taken(self, nickname: str):
+        self.taken.add(nickname)
+
+    async def warm(self, db: AsyncSession, chunk_rows: int = 10000):
+        """Load every existing nickname into the filter."""
+        result = await db.stream(select(User.nickname).execution_options(yield_per=chunk_rows))
+        async for nicknames in result.scalars().partitions():
+            for nickname in nicknames:
+                self.taken.add(nickname)
+
+    async def allocate(self, db: AsyncSession, email: str) -> str:
+        return (await self.allocate_many(db, [email]))[0]
+
+    async def allocate_many(self, db: AsyncSession, emails: list, reserved: set = frozenset()) -> list:
+        """Return one free nickname per email, avoiding ``reserved`` and each other."""
+        proposals = [nickname_candidates(email, self.candidates) for email in emails]
+        unknown = {candidate for candidates in proposals for candidate in candidates if candidate not in self.taken}
+        unavailable = set(reserved)
+        if unknown:
+            result = await db.execute(select(User.nickname).where(User.nickname.in_(unknown)))
+            for nickname in result.scalars():
+                self.taken.add(nickname)
+                unavailable.add(nickname)
+
+        allocated = []
+        for email, candidates in zip(emails, proposals):
+            nickname = next((c for c in candidates if c in unknown and c not in unavailable), None)
+            if nickname is None:
+                # Every candidate is taken; a long random suffix is unique in practice
+                nickname = f"{generate_nickname(email)}_{secrets.token_hex(4)}"
+            unavailable.add(nickname)
+            # Reserve it in this process straight away so concurrent signups pick another
+            self.taken.add(nickname)
+            allocated.append(nickname)
+        return allocated
+
+
+nickname_allocator = NicknameAllocator(
+    BloomFilter(settings.nickname_filter_capacity, settings.nickname_filter_error_rate),
+    candidates=settings.nickname_candidates,
+)
@@ -0,0 +1,124 @@
+from builtins import Exception, dict, int, len, list, set, str
+from logging import getLogger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User
+from app.settings.config import get_settings
+from app.utils.prefix_index import PrefixIndex
+
+logger = getLogger(__name__)
+settings = get_settings()
+
+class UserAutocomplete:
+    """
+    In-process type-ahead over user nicknames and emails.
+
+    The index is loaded from the database once at startup and then kept current by the writes
+    ``UserService`` makes in this process; writes made by other processes show up after their
+    next load. Until it is loaded, or once it has outgrown ``max_entries``, ``usable`` is False
+    and callers should query the database instead.
+    """
+
+    def __init__(self, max_entries: int = 2000000):
+        self.index = PrefixIndex(max_entries)
+        self.ready = False
+        # Changes made while ``warm`` streams its snapshot, or None when no load is running
+        self._pending = None
+
+    @property
+    def usable(self) -> bool:
+        return self.ready and self.index.complete
+
+    async def warm(self, db: AsyncSession, chunk_rows: int = 10000):
+        """
+        Rebuild the index from every user, streaming rows in chunks.
+
+        Users added, renamed or deleted while the snapshot streams may be in it in their old
+        state, so those changes are replayed over it, in order, before the index turns ready.
+        """
+        self.clear()
+        self._pending = []
+        try:
+            result = await db.stream(select(User.id, User.nickname, User.email).execution_options(yield_per=chunk_rows))
+            async for rows in result.partitions():
+                self._add_users(rows)
+            for change, args in self._pending:
+                change(*args)
+            self.ready = True
+        finally:
+            self._pending = None
+
+    async def load(self, session_factory):
+        """``warm`` on a session of its own; meant to run as a background task."""
+        try:
+            async with session_factory() as db:
+                await self.warm(db)
+        except Exception as e:
+            logger.error("Loading the autocomplete index failed: %s", e)
+
+    def clear(self):
+        """Forget every entry; the index is unusable until the next ``warm``."""
+        self.ready = False
+        self.index.clear()
+
+    def _apply(self, change, *args):
+        change(*args)
+        if self._pending is not None:
+            self._pending.append((change, args))
+
+    def _add_user(self, user_id, nickname: str, email: str):
+        self.index.add(nickname, user_id.hex)
+        self.index.add(email, user_id.hex)
+
+    def _add_users(self, users):
+        self.index.add_many(
+            pair for user_id, nickname, email in users for pair in ((nickname, user_id.hex), (email, user_id.hex))
+        )
+
+    def _remove_user(self, user_id, nickname: str, email: str):
+        self.index.discard(nickname, user_id.hex)
+        self.index.discard(email, user_id.hex)
+
+    def add_user(self, user_id, nickname: str, email: str):
+        self._apply(self._add_user, user_id, nickname, email)
+
+    def add_users(self, users):
+        """Add ``(user_id, nickname, email)`` triples in one pass."""
+        self._apply(self._add_users, list(users))
+
+    def remove_user(self, user_id, nickname: str, email: str):
+        self._apply(self._remove_user, user_id, nickname, email)
+
+    def replace_user(self, user_id, old: tuple, new: tuple):
+        """Swap a user's ``(nickname, email)`` pair after it changed."""
+        if old != new:
+            self.remove_user(user_id, *old)
+            self.add_user(user_id, *new)
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """Users whose nickname or email starts with ``prefix``, one suggestion per user."""
+        # A user can match on both keys, so read enough entries to still fill the page
+        suggestions, seen = [], set()
+        for value, user_id in self.index.search(prefix, limit * 2):
+            if user_id not in seen:
+                seen.add(user_id)
+                suggestions.append({"id": user_id, "value": value})
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+    def stats(self) -> dict:
+        entries = len(self.index)
+        memory = self.index.memory_bytes()
+        return {
+            "ready": self.ready,
+            "complete": self.index.complete,
+            "entries": entries,
+            "max_entries": self.index.max_entries,
+            "memory_bytes": memory,
+            # Two entries (nickname and email) per user
+            "bytes_per_million_users": int(memory / entries * 2 * 1000000) if entries else None,
+        }
+
+
+user_autocomplete = UserAutocomplete(settings.autocomplete_max_entries)
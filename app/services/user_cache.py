@@ -0,0 +1,138 @@
+from builtins import Exception, dict, str
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from app.models.user_model import User
+from app.settings.config import get_settings
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+class UserCacheBackend(ABC):
+    """
+    Storage for cached user records. Values are plain dicts of column values so that
+    external stores only need to serialize simple types.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: dict):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    async def clear(self):
+        """Drop every entry; optional for shared stores."""
+
+class InMemoryUserCacheBackend(UserCacheBackend):
+    """Per-process TTL + LRU store."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: dict):
+        self.cache.set(key, value)
+
+    async def delete(self, key: str):
+        self.cache.delete(key)
+
+    async def clear(self):
+        self.cache.clear()
+
+class UserCache:
+    """
+    Read-through cache of user records by ID.
+
+    Concurrent misses for the same ID share a single database fetch; if the request making it
+    is cancelled, a waiting one takes over. Writers must call ``invalidate`` after committing;
+    a fetch that overlaps an invalidation is not stored. Only primary sessions fill the cache:
+    a lagging replica can return a row older than the last invalidation.
+    """
+
+    def __init__(self, backend: UserCacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self._inflight = {}  # key -> future resolving to column values
+        self._generation = 0
+
+    @staticmethod
+    def _snapshot(user: User) -> dict:
+        return {attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs}
+
+    async def _attach(self, db: AsyncSession, values: dict) -> User:
+        """Bind cached values to ``db`` as a persistent instance without issuing a SELECT."""
+        user = User(**values)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    async def _fetch(self, db: AsyncSession, key: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.id == key))
+        return result.scalar_one_or_none()
+
+    async def get_user(self, db: AsyncSession, user_id) -> Optional[User]:
+        key = str(user_id)
+        if not self.enabled:
+            return await self._fetch(db, key)
+
+        values = await self.backend.get(key)
+        if values is not None:
+            return await self._attach(db, values)
+        if db.info.get("replica"):
+            return await self._fetch(db, key)
+
+        while (pending := self._inflight.get(key)) is not None:
+            try:
+                values = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The fetch runs on the fetching request's session, so when that request is
+                # cancelled (and this one is not) fetch again, here
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+            return await self._attach(db, values) if values is not None else None
+
+        future = asyncio.get_running_loop().create_future()
+        # Avoid "exception was never retrieved" warnings when nobody else was waiting
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            user = await self._fetch(db, key)
+            values = self._snapshot(user) if user is not None else None
+            if values is not None and generation == self._generation:
+                await self.backend.set(key, values)
+            future.set_result(values)
+            return user
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def invalidate(self, user_id):
+        self._generation += 1
+        await self.backend.delete(str(user_id))
+
+    async def clear(self):
+        self._generation += 1
+        await self.backend.clear()
+
+
+user_cache = UserCache(
+    InMemoryUserCacheBackend(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl),
+    enabled=settings.user_cache_enabled,
+)
@@ -0,0 +1,74 @@
+from builtins import ValueError, dict, isinstance, list, map, str, zip
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import select
+from app.models.user_model import User
+from app.settings.config import get_settings
+
+settings = get_settings()
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+# Columns that may be exported; credentials and tokens are never included
+EXPORT_FIELDS = (
+    "id", "email", "nickname", "first_name", "last_name", "bio", "profile_picture_url",
+    "linkedin_profile_url", "github_profile_url", "role", "is_professional",
+    "professional_status_updated_at", "last_login_at", "failed_login_attempts", "is_locked",
+    "email_verified", "created_at", "updated_at",
+)
+
+def parse_fields(fields: Optional[str]) -> list:
+    """Turn a comma-separated field list into column names, defaulting to every exportable column."""
+    if not fields:
+        return list(EXPORT_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in EXPORT_FIELDS]
+    if unknown or not names:
+        raise ValueError(f"Unknown export fields: {', '.join(unknown)}")
+    return names
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+async def export_users(session_factory, format: str, fields: list, updated_since: Optional[datetime] = None,
+                       updated_before: Optional[datetime] = None, chunk_rows: int = None):
+    """
+    Yield the users table as NDJSON or CSV text chunks.
+
+    Rows are read through a server-side cursor ``chunk_rows`` at a time, so memory use does not
+    depend on the table size. The session is opened here because the response outlives the
+    request's own session.
+    """
+    chunk_rows = chunk_rows or settings.export_chunk_rows
+    query = select(*(getattr(User, name) for name in fields))
+    if updated_since is not None:
+        query = query.where(User.updated_at >= updated_since)
+    if updated_before is not None:
+        query = query.where(User.updated_at < updated_before)
+
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()
+
+    async with session_factory() as session:
+        result = await session.stream(query.execution_options(yield_per=chunk_rows))
+        async for rows in result.partitions():
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([_plain(value) for value in row] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(dict(zip(fields, map(_plain, row)))) + "\n" for row in rows)
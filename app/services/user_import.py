@@ -0,0 +1,318 @@
+from builtins import Exception, ValueError, dict, enumerate, int, isinstance, len, list, range, round, set, str, zip
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging import getLogger
+from pydantic import ValidationError
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.analytics.analytics_service import record_signup
+from app.models.user_model import User, UserRole
+from app.schemas.user_schemas import UserCreate
+from app.services.email_outbox import enqueue_email
+from app.services.nickname_allocator import nickname_allocator
+from app.services.user_autocomplete import user_autocomplete
+from app.services.user_service import verification_email_context
+from app.settings.config import get_settings
+from app.utils.hashing_executor import get_hashing_executor
+from app.utils.security import generate_verification_token, hash_password_async
+
+logger = getLogger(__name__)
+settings = get_settings()
+
+IMPORT_FORMATS = ("csv", "ndjson")
+_MAX_TRACKED_JOBS = 50
+# Upload bytes held in memory before the spooled body moves to a temporary file
+_SPOOL_MEMORY = 1024 * 1024
+
+class ImportJob:
+    """Progress and outcome of one bulk import; per-row errors are capped at ``max_errors``."""
+
+    def __init__(self, format: str, max_errors: int = None):
+        self.id = uuid.uuid4()
+        self.format = format
+        self.status = "running"
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.rows_processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors if max_errors is not None else settings.import_max_errors
+        # Every email and nickname seen so far, so duplicates inside the file are reported too
+        self.seen_emails = set()
+        self.seen_nicknames = set()
+
+    def fail_row(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": error})
+
+    def as_dict(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "id": str(self.id),
+            "format": self.format,
+            "status": self.status,
+            "rows_processed": self.rows_processed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_processed / elapsed, 1) if elapsed > 0 else 0.0,
+            "errors": self.errors,
+        }
+
+# Recent jobs by ID, oldest first, for progress polling. They live in this process only, so
+# with several workers a status request must reach the worker that accepted the import.
+import_jobs = OrderedDict()
+# Running background imports, referenced so they are not garbage collected mid-run
+_import_tasks = set()
+
+def _track(job: ImportJob):
+    import_jobs[str(job.id)] = job
+    while len(import_jobs) > _MAX_TRACKED_JOBS:
+        import_jobs.popitem(last=False)
+
+async def _lines(chunks):
+    """Split a byte stream into decoded lines without holding the whole body."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+async def _records(chunks, format: str):
+    """Yield ``(row number, dict or error message)`` for each record in the stream."""
+    header = None
+    pending = ""
+    row = 0
+    async for line in _lines(chunks):
+        if format == "ndjson":
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row, f"Invalid JSON: {e}"
+                continue
+            yield row, record if isinstance(record, dict) else "Each line must be a JSON object"
+            continue
+
+        # CSV: a quoted field may span lines, so wait until the quotes balance
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+        values = next(csv.reader(io.StringIO(record)))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {name: value for name, value in zip(header, values) if value != ""}
+    if pending:
+        yield row + 1, "Unterminated quoted field"
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+async def _import_batch(db: AsyncSession, batch: list, job: ImportJob):
+    """Hash, insert and queue verification emails for a batch of validated ``(row, UserCreate)`` pairs."""
+    missing = [user for _, user in batch if not user.nickname]
+    if missing:
+        nicknames = await nickname_allocator.allocate_many(db, [user.email for user in missing], job.seen_nicknames)
+        for user, nickname in zip(missing, nicknames):
+            user.nickname = nickname
+            job.seen_nicknames.add(nickname)
+
+    emails = [user.email for _, user in batch]
+    nicknames = [user.nickname for _, user in batch]
+    existing = await db.execute(
+        select(User.email, User.nickname).where(or_(User.email.in_(emails), User.nickname.in_(nicknames)))
+    )
+    taken_emails, taken_nicknames = set(), set()
+    for email, nickname in existing:
+        taken_emails.add(email)
+        taken_nicknames.add(nickname)
+
+    accepted = []
+    for row, user in batch:
+        if user.email in taken_emails:
+            job.fail_row(row, "Email already exists.")
+        elif user.nickname in taken_nicknames:
+            job.fail_row(row, "Nickname already exists.")
+        else:
+            accepted.append((row, user))
+    if not accepted:
+        return
+
+    # Hash a worker's worth at a time and wait for slots, so a large import neither fails
+    # on a full executor nor fills the queue that logins and registrations rely on
+    step = get_hashing_executor().workers
+    hashes = []
+    for start in range(0, len(accepted), step):
+        hashes += await asyncio.gather(
+            *(hash_password_async(user.password, wait=True) for _, user in accepted[start:start + step])
+        )
+    now = datetime.now(timezone.utc)
+    values = []
+    for (_, user), hashed_password in zip(accepted, hashes):
+        data = user.model_dump(exclude={"password"})
+        data.update(
+            id=uuid.uuid4(),
+            hashed_password=hashed_password,
+            verification_token=generate_verification_token(),
+            created_at=now,
+            email_verified=False,
+            is_locked=False,
+            failed_login_attempts=0,
+            role=user.role or UserRole.AUTHENTICATED,
+        )
+        values.append(data)
+
+    try:
+        inserted = await _insert_users(db, values, now)
+    except DBAPIError:
+        # Something in the batch was rejected by the database; retry row by row to find it
+        await db.rollback()
+        inserted = set()
+        for (row, _), data in zip(accepted, values):
+            try:
+                inserted |= await _insert_users(db, [data], now)
+            except DBAPIError as e:
+                await db.rollback()
+                job.fail_row(row, str(e.orig).splitlines()[-1])
+                data["rejected"] = True
+    for (row, _), data in zip(accepted, values):
+        if data["id"] not in inserted and not data.get("rejected"):
+            job.fail_row(row, "Email or nickname already exists.")
+    job.imported += len(inserted)
+
+async def _insert_users(db: AsyncSession, values: list, now: datetime) -> set:
+    """Insert users with their verification emails and cohort counts in one transaction; returns inserted IDs."""
+    # Rows that lost a race with a concurrent insert are skipped rather than failing the batch
+    result = await db.execute(insert(User).on_conflict_do_nothing().returning(User.id), values)
+    inserted = {user_id for user_id, in result}
+    for data in values:
+        if data["id"] in inserted:
+            enqueue_email(db, data["email"], "email_verification", verification_email_context(
+                data["id"], data["verification_token"], data.get("first_name") or data["nickname"]
+            ))
+    if inserted:
+        await record_signup(db, now, len(inserted))
+    await db.commit()
+    user_autocomplete.add_users((data["id"], data["nickname"], data["email"]) for data in values if data["id"] in inserted)
+    return inserted
+
+async def import_users(db: AsyncSession, chunks, format: str, batch_size: int = None, job: ImportJob = None) -> ImportJob:
+    """
+    Import users from a CSV (with header row) or NDJSON byte stream.
+
+    Rows are validated as they arrive and written in batches of ``batch_size``, each batch
+    in its own transaction; invalid or duplicate rows are reported in the job and skipped.
+    """
+    if format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {format}")
+    batch_size = batch_size or settings.import_batch_size
+    if job is None:
+        job = ImportJob(format)
+        _track(job)
+    batch = []
+    try:
+        async for row, record in _records(chunks, format):
+            job.rows_processed += 1
+            if isinstance(record, str):
+                job.fail_row(row, record)
+                continue
+            try:
+                user = UserCreate(**record)
+            except ValidationError as e:
+                job.fail_row(row, _validation_message(e))
+                continue
+            if user.email in job.seen_emails:
+                job.fail_row(row, "Duplicate email in import.")
+                continue
+            if user.nickname and user.nickname in job.seen_nicknames:
+                job.fail_row(row, "Duplicate nickname in import.")
+                continue
+            job.seen_emails.add(user.email)
+            if user.nickname:
+                # Missing nicknames are allocated per batch
+                job.seen_nicknames.add(user.nickname)
+            batch.append((row, user))
+            if len(batch) >= batch_size:
+                await _import_batch(db, batch, job)
+                batch = []
+        if batch:
+            await _import_batch(db, batch, job)
+        job.status = "completed"
+    except Exception:
+        job.status = "failed"
+        await db.rollback()
+        logger.exception("User import %s failed after %d rows", job.id, job.rows_processed)
+        raise
+    finally:
+        job.finished_at = time.monotonic()
+        job.seen_emails, job.seen_nicknames = set(), set()
+    return job
+
+async def _spooled_chunks(spool, chunk_size: int = 65536):
+    try:
+        while chunk := spool.read(chunk_size):
+            yield chunk
+    finally:
+        spool.close()
+
+async def _run_import(session_factory, job: ImportJob, chunks, batch_size: int = None):
+    try:
+        async with session_factory() as db:
+            await import_users(db, chunks, job.format, batch_size, job)
+    except Exception:
+        # import_users has logged and marked its own failures; anything else happened around it
+        if job.status != "failed":
+            logger.exception("User import %s failed", job.id)
+            job.status = "failed"
+            job.finished_at = time.monotonic()
+
+async def start_import(session_factory, chunks, format: str, batch_size: int = None) -> ImportJob:
+    """
+    Receive an upload and import it on a background task with a session of its own.
+
+    The body is spooled to a temporary file first, since a request stream cannot be read once
+    the response has been sent; the job is returned as soon as the upload is in, and its
+    progress can then be polled from ``import_jobs``.
+    """
+    if format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {format}")
+    job = ImportJob(format)
+    _track(job)
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY)
+    try:
+        async for chunk in chunks:
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        job.status = "failed"
+        job.finished_at = time.monotonic()
+        raise
+    spool.seek(0)
+    task = asyncio.create_task(_run_import(session_factory, job, _spooled_chunks(spool), batch_size))
+    _import_tasks.add(task)
+    task.add_done_callback(_import_tasks.discard)
+    return job
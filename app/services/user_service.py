@@ -1,107 +1,484 @@
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.user_model import User, UserRole
-from app.utils.nickname_generator import generate_nickname
-from app.utils.security import hash_password
+from sqlalchemy import Float, case, cast, delete, false, func, or_, select, text, true, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import make_transient_to_detached
+from app.analytics.analytics_service import count_signups_from, record_activity
+from app.database import Database
+from app.models.row_count_model import RowCount
+from app.models.user_model import USER_SEARCH_DOCUMENT, User, UserRole
+from app.schemas.pagination_schema import CountStrategy
+from app.schemas.user_schemas import UserResponse
+from app.services.email_outbox import enqueue_email_for
+from app.services.nickname_allocator import nickname_allocator
+from app.services.user_autocomplete import user_autocomplete
+from app.services.user_cache import user_cache
+from app.settings.config import get_settings
+from app.utils.cursor import decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+from app.utils.security import generate_verification_token, hash_password_async, verify_password_async
+
+settings = get_settings()
+
+# Columns a UserResponse is built from; reads never select secrets such as hashed_password
+USER_RESPONSE_FIELDS = tuple(UserResponse.model_fields)
+
+def parse_user_fields(fields: Optional[str]) -> tuple:
+    """Validate a comma-separated ``fields`` parameter; the id is always included."""
+    if not fields:
+        return USER_RESPONSE_FIELDS
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in USER_RESPONSE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown user fields: {', '.join(unknown)}")
+    return ("id",) + tuple(dict.fromkeys(name for name in names if name != "id"))
+
+def _columns(fields, *extra) -> list:
+    columns = User.__table__.c
+    return [columns[name] for name in dict.fromkeys((*fields, *extra))]
+
+# Seconds before the pg_trgm check is repeated, so installing it takes effect without a restart
+TRIGRAM_CHECK_INTERVAL = 300.0
+_trigram_available = None
+_trigram_checked_at = 0.0
+
+async def _has_trigram(db: AsyncSession) -> bool:
+    """Whether pg_trgm is installed; fuzzy matching and similarity ranking need it."""
+    global _trigram_available, _trigram_checked_at
+    now = time.monotonic()
+    if _trigram_available is None or now - _trigram_checked_at > TRIGRAM_CHECK_INTERVAL:
+        _trigram_available = await db.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"))
+        _trigram_checked_at = now
+    return _trigram_available
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+# Inserts tried with a fresh server-chosen nickname when a concurrent signup takes the previous one
+NICKNAME_ATTEMPTS = 3
+
+def verification_email_context(user_id, token: str, name: str) -> dict:
+    """Template context for a user's email_verification message."""
+    return {
+        "name": name,
+        "verification_url": f"{str(settings.server_base_url).rstrip('/')}/verify-email/{user_id}/{token}",
+    }
 
 class UserService:
 
     @staticmethod
-    async def register_user(db: AsyncSession, user_data: dict, email_service) -> User:
+    async def register_user(db: AsyncSession, user_data: dict) -> User:
+        """
+        Create a user and queue its verification email in a single statement.
+
+        The user insert, outbox message and cohort count run as one ``INSERT ... ON CONFLICT DO
+        NOTHING RETURNING`` with data-modifying CTEs, so a duplicate email or nickname is settled
+        by the unique indexes rather than a prior SELECT. A server-chosen nickname that a
+        concurrent signup took first is replaced and the insert retried.
+        """
         if not user_data.get("email") or not user_data.get("password"):
             raise HTTPException(status_code=400, detail="Email and password are required.")
 
-        existing_user = await db.execute(select(User).where(User.email == user_data["email"]))
-        if existing_user.scalar_one_or_none():
-            raise HTTPException(status_code=400, detail="Email already exists.")
-
-        if not user_data.get("nickname"):
-            user_data["nickname"] = generate_nickname(user_data["email"])
-
+        generated_nickname = not user_data.get("nickname")
         role_value = user_data.get("role", "AUTHENTICATED")
         try:
             role = UserRole(role_value)
         except ValueError:
             role = UserRole.AUTHENTICATED
 
-        new_user = User(
-            email=user_data["email"],
-            nickname=user_data["nickname"],
-            first_name=user_data.get("first_name"),
-            last_name=user_data.get("last_name"),
-            role=role,
-            hashed_password=hash_password(user_data["password"]),
-            is_professional=user_data.get("is_professional", False),
-        )
+        now = datetime.now(timezone.utc)
+        values = {
+            "id": uuid.uuid4(),
+            "email": user_data["email"],
+            "nickname": user_data.get("nickname"),
+            "first_name": user_data.get("first_name"),
+            "last_name": user_data.get("last_name"),
+            "role": role,
+            "hashed_password": await hash_password_async(user_data["password"]),
+            "is_professional": user_data.get("is_professional", False),
+            "verification_token": generate_verification_token(),
+            "created_at": now,
+            # Column defaults are not applied inside a CTE, so spell them out
+            "email_verified": False,
+            "is_locked": False,
+            "account_locked": False,
+            "failed_login_attempts": 0,
+        }
+        for _ in range(NICKNAME_ATTEMPTS):
+            if generated_nickname:
+                values["nickname"] = user_data["nickname"] = await nickname_allocator.allocate(db, values["email"])
+            new_user = (
+                insert(User).values(**values).on_conflict_do_nothing()
+                .returning(*User.__table__.c).cte("new_user")
+            )
+            statement = (
+                select(new_user)
+                .add_cte(enqueue_email_for(new_user, values["email"], "email_verification", verification_email_context(
+                    values["id"], values["verification_token"], values["first_name"] or values["nickname"]
+                )).cte("queued_email"))
+                .add_cte(count_signups_from(new_user, now).cte("counted_signup"))
+            )
+            row = (await db.execute(statement)).mappings().first()
+            if row is not None:
+                await db.commit()
+                break
 
-        db.add(new_user)
-        await db.commit()
-        await db.refresh(new_user)
+            # Nothing was written; end the transaction before looking for what conflicted
+            await db.rollback()
+            existing = await db.execute(
+                select(User.email).where(or_(User.email == values["email"], User.nickname == values["nickname"]))
+            )
+            if values["email"] in existing.scalars().all():
+                raise HTTPException(status_code=400, detail="Email already exists.")
+            if not generated_nickname:
+                raise HTTPException(status_code=400, detail="Nickname already exists.")
+            # A concurrent signup took the nickname we picked; the allocator now knows it is taken
+        else:
+            raise HTTPException(status_code=503, detail="Could not allocate a nickname, please retry.")
 
-        await email_service(new_user, new_user.verification_token)
-        return new_user
+        nickname_allocator.mark_taken(values["nickname"])
+        user_autocomplete.add_user(values["id"], values["nickname"], values["email"])
+        # The row came back from RETURNING, so attach it to the session without reloading
+        user = User(**row)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
 
     @staticmethod
     async def get_user_by_id(db: AsyncSession, user_id: str) -> User:
-        result = await db.execute(select(User).where(User.id == user_id))
+        """Read-through lookup; writers below invalidate the cached record after committing."""
+        return await user_cache.get_user(db, user_id)
+
+    @staticmethod
+    async def _get_user_for_write(db: AsyncSession, user_id: str) -> Optional[User]:
+        """The user as stored now, bypassing the cache: writers read values from it (e.g. for the autocomplete index)."""
+        result = await db.execute(
+            select(User).where(User.id == user_id).execution_options(populate_existing=True)
+        )
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_user_fields(db: AsyncSession, user_id: str, fields: tuple = USER_RESPONSE_FIELDS):
+        """Only ``fields`` (plus ``updated_at``) of one user as a row, or None if it does not exist."""
+        result = await db.execute(select(*_columns(fields, "updated_at")).where(User.id == user_id))
+        return result.one_or_none()
+
     @staticmethod
     async def update_user(db: AsyncSession, user_id: str, user_data: dict) -> User:
-        user = await UserService.get_user_by_id(db, user_id)
+        user = await UserService._get_user_for_write(db, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found.")
 
+        previous = (user.nickname, user.email)
         for key, value in user_data.items():
             setattr(user, key, value)
 
         await db.commit()
+        await user_cache.invalidate(user.id)
         await db.refresh(user)
+        user_autocomplete.replace_user(user.id, previous, (user.nickname, user.email))
         return user
 
+    @staticmethod
+    async def get_user_version(db: AsyncSession, user_id: str) -> Optional[datetime]:
+        """Only the user's ``updated_at``, for conditional requests; None if the user does not exist."""
+        return await db.scalar(select(User.updated_at).where(User.id == user_id))
+
+    @staticmethod
+    async def update_user_if_unmodified(db: AsyncSession, user_id: str, user_data: dict, versions: list) -> User:
+        """
+        Apply ``user_data`` only if the user's ``updated_at`` is one of ``versions``, in a single
+        conditional UPDATE so a concurrent change cannot slip in between check and write.
+        """
+        # The CTE reads the row as it was before the update, for the autocomplete index
+        previous = select(User.id, User.nickname, User.email).where(User.id == user_id).cte("previous")
+        result = await db.execute(
+            update(User)
+            .where(User.id == previous.c.id, User.updated_at.in_(versions))
+            .values(**user_data)
+            .returning(User.id, User.nickname, User.email, previous.c.nickname, previous.c.email)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        if row is None:
+            if await UserService.get_user_version(db, user_id) is None:
+                raise HTTPException(status_code=404, detail="User not found.")
+            raise HTTPException(status_code=412, detail="User was modified by another request.")
+        updated_id, nickname, email, previous_nickname, previous_email = row
+        await db.commit()
+        await user_cache.invalidate(updated_id)
+        user_autocomplete.replace_user(updated_id, (previous_nickname, previous_email), (nickname, email))
+        return await db.get(User, updated_id, populate_existing=True)
+
     @staticmethod
     async def delete_user(db: AsyncSession, user_id: str) -> bool:
-        user = await UserService.get_user_by_id(db, user_id)
+        user = await UserService._get_user_for_write(db, user_id)
         if not user:
             return False
 
+        removed = (user.id, user.nickname, user.email)
         await db.delete(user)
         await db.commit()
+        await user_cache.invalidate(user.id)
+        user_autocomplete.remove_user(*removed)
         return True
 
     @staticmethod
-    async def list_users(db: AsyncSession, skip: int = 0, limit: int = 10):
-        result = await db.execute(select(User).offset(skip).limit(limit))
-        users = result.scalars().all()
+    def _filter_criteria(filters: dict) -> list:
+        """WHERE clauses for the allow-listed user filters present in ``filters``."""
+        criteria = []
+        if filters.get("ids") is not None:
+            criteria.append(User.id.in_(filters["ids"]))
+        if filters.get("role") is not None:
+            criteria.append(User.role == filters["role"])
+        for name in ("email_verified", "is_locked", "is_professional"):
+            if filters.get(name) is not None:
+                # Inline constants so the planner can match the partial indexes under generic plans
+                criteria.append(getattr(User, name) == (true() if filters[name] else false()))
+        if filters.get("created_after") is not None:
+            criteria.append(User.created_at >= filters["created_after"])
+        if filters.get("created_before") is not None:
+            criteria.append(User.created_at < filters["created_before"])
+        return criteria
+
+    @staticmethod
+    def _bulk_criteria(filters: dict) -> list:
+        criteria = UserService._filter_criteria(filters)
+        if not criteria:
+            raise HTTPException(status_code=400, detail="At least one filter is required for bulk operations.")
+        return criteria
+
+    @staticmethod
+    async def _bulk_execute(db: AsyncSession, make_statement, filters: dict, chunk_size: int = None,
+                            removes: bool = False) -> int:
+        """
+        Apply ``make_statement(condition)`` to matching users one chunk at a time, walking the
+        primary key so each statement touches at most ``chunk_size`` rows. Each chunk commits
+        on its own; returns the number of rows affected. ``removes`` marks statements that
+        delete the rows, which are then dropped from the autocomplete index.
+        """
+        criteria = UserService._bulk_criteria(filters)
+        chunk_size = chunk_size or settings.bulk_chunk_size
+        affected, last_id = 0, None
+        while True:
+            chunk = select(User.id).where(*criteria)
+            if last_id is not None:
+                chunk = chunk.where(User.id > last_id)
+            chunk = chunk.order_by(User.id).limit(chunk_size)
+            statement = make_statement(User.id.in_(chunk)).returning(User.id, User.nickname, User.email)
+            result = await db.execute(statement.execution_options(synchronize_session=False))
+            rows = result.all()
+            user_ids = [user_id for user_id, _, _ in rows]
+            await db.commit()
+            for user_id, nickname, email in rows:
+                await user_cache.invalidate(user_id)
+                if removes:
+                    user_autocomplete.remove_user(user_id, nickname, email)
+            affected += len(user_ids)
+            if len(user_ids) < chunk_size:
+                return affected
+            last_id = max(user_ids)
+
+    @staticmethod
+    async def bulk_update_users(db: AsyncSession, filters: dict, changes: dict, chunk_size: int = None) -> int:
+        """Set ``changes`` on every user matching ``filters`` with set-based UPDATEs; returns the count."""
+        if not changes:
+            raise HTTPException(status_code=400, detail="No changes provided.")
+        changes = dict(changes)
+        if "is_professional" in changes:
+            changes["professional_status_updated_at"] = func.now()
+        return await UserService._bulk_execute(
+            db, lambda condition: update(User).where(condition).values(**changes), filters, chunk_size
+        )
+
+    @staticmethod
+    async def bulk_delete_users(db: AsyncSession, filters: dict, chunk_size: int = None) -> int:
+        """Delete every user matching ``filters`` with set-based DELETEs; returns the count."""
+        return await UserService._bulk_execute(
+            db, lambda condition: delete(User).where(condition), filters, chunk_size, removes=True
+        )
+
+    @staticmethod
+    async def count_users(db: AsyncSession, strategy: CountStrategy = CountStrategy.EXACT, criteria: list = ()):
+        """
+        Return ``(total, is_exact)`` for the users table using the given strategy. Filtered
+        totals (``criteria``) are always counted exactly, as the shortcuts cover the whole table.
+        """
+        if strategy == CountStrategy.NONE:
+            return None, None
+        if criteria:
+            return await db.scalar(select(func.count()).select_from(User).where(*criteria)), True
+        if strategy == CountStrategy.COUNTER:
+            total = await db.scalar(select(RowCount.row_count).where(RowCount.table_name == User.__tablename__))
+            if total is not None:
+                return total, True
+        elif strategy == CountStrategy.ESTIMATED:
+            # reltuples is -1 until the table has been vacuumed or analyzed
+            estimate = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass"))
+            if estimate is not None and estimate >= 0:
+                return estimate, False
         total = await db.scalar(select(func.count()).select_from(User))
+        return total, True
+
+    @staticmethod
+    async def list_users(db: AsyncSession, skip: int = 0, limit: int = 10, count_strategy: CountStrategy = None,
+                         fields: tuple = USER_RESPONSE_FIELDS, filters: dict = None, sort: str = "created_at"):
+        criteria = UserService._filter_criteria(filters or {})
+        column = getattr(User, sort.lstrip("-"))
+        order = (column.desc(), User.id.desc()) if sort.startswith("-") else (column, User.id)
+        # Fetch one extra row so has_more is known even when the count is skipped
+        result = await db.execute(
+            select(*_columns(fields)).where(*criteria).order_by(*order).offset(skip).limit(limit + 1)
+        )
+        users = result.all()
+        has_more = len(users) > limit
+        strategy = count_strategy or settings.user_count_strategy
+        total, total_is_exact = await UserService.count_users(db, strategy, criteria)
 
         return {
-            "items": users,
+            "items": users[:limit],
             "total": total,
+            "total_is_exact": total_is_exact,
+            "has_more": has_more,
             "page": skip // limit + 1,
             "size": limit
         }
 
+    @staticmethod
+    async def list_users_by_cursor(db: AsyncSession, cursor: str = None, limit: int = 10,
+                                   fields: tuple = USER_RESPONSE_FIELDS, filters: dict = None, sort: str = "created_at"):
+        """
+        Keyset-paginated listing ordered by ``sort`` then id; cost does not grow with page depth.
+        Filters are applied inside the keyset range, so with the default ordering each filter
+        is served by its own (created_at, id) index.
+        """
+        name = sort.lstrip("-")
+        column = getattr(User, name)
+        sort_key = tuple_(column, User.id)
+        query = select(*_columns(fields, "id", name)).where(*UserService._filter_criteria(filters or {}))
+        direction = "next"
+        if cursor:
+            key, user_id, direction = decode_cursor(cursor, sort)
+        # Walk the index forwards for next pages of an ascending sort, backwards otherwise
+        ascending = (direction == "next") != sort.startswith("-")
+        if cursor:
+            query = query.where(sort_key > tuple_(key, user_id) if ascending else sort_key < tuple_(key, user_id))
+        if ascending:
+            query = query.order_by(column, User.id)
+        else:
+            query = query.order_by(column.desc(), User.id.desc())
+
+        # Fetch one extra row to learn whether another page exists
+        result = await db.execute(query.limit(limit + 1))
+        users = list(result.all())
+        has_more = len(users) > limit
+        users = users[:limit]
+        if direction == "prev":
+            users.reverse()
+
+        next_cursor = prev_cursor = None
+        if users:
+            if direction == "prev" or has_more:
+                next_cursor = encode_cursor(getattr(users[-1], name), users[-1].id, "next", sort)
+            if (direction == "next" and cursor) or (direction == "prev" and has_more):
+                prev_cursor = encode_cursor(getattr(users[0], name), users[0].id, "prev", sort)
+
+        return {
+            "items": users,
+            "size": limit,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    @staticmethod
+    async def search_users(db: AsyncSession, query: str, limit: int = 10, cursor: str = None,
+                           fields: tuple = USER_RESPONSE_FIELDS):
+        """
+        Substring, fuzzy and full-text search over email, nickname and names, best matches first.
+
+        Exact and prefix matches on email or nickname rank highest, followed by full-text rank and,
+        when pg_trgm is installed, trigram similarity. Pages are keyset-paginated on (rank, id).
+        """
+        term = query.strip()
+        if not term:
+            raise ValueError("Search query must not be empty")
+        escaped = _escape_like(term)
+        ts_query = func.plainto_tsquery(text("'simple'"), term)
+        searched = (User.email, User.nickname, User.first_name, User.last_name)
+
+        matches = [column.ilike(f"%{escaped}%", escape="\\") for column in searched]
+        matches.append(USER_SEARCH_DOCUMENT.op("@@")(ts_query))
+        rank = (
+            case((or_(func.lower(User.email) == term.lower(), func.lower(User.nickname) == term.lower()), 2.0), else_=0.0)
+            + case((or_(User.email.ilike(f"{escaped}%", escape="\\"), User.nickname.ilike(f"{escaped}%", escape="\\")), 1.0), else_=0.0)
+            + cast(func.ts_rank(USER_SEARCH_DOCUMENT, ts_query), Float)
+        )
+        if await _has_trigram(db):
+            matches.extend(column.op("%")(term) for column in searched)
+            rank = rank + cast(func.greatest(*(func.similarity(column, term) for column in searched)), Float)
+
+        ranked = select(*_columns(fields, "id"), rank.label("rank")).where(or_(*matches)).subquery()
+        page = select(ranked).order_by(ranked.c.rank.desc(), ranked.c.id.desc())
+        if cursor:
+            rank_after, id_after = decode_rank_cursor(cursor)
+            page = page.where(tuple_(ranked.c.rank, ranked.c.id) < tuple_(rank_after, id_after))
+
+        # Fetch one extra row to learn whether another page exists
+        result = await db.execute(page.limit(limit + 1))
+        users = result.all()
+        has_more = len(users) > limit
+        users = users[:limit]
+        return {
+            "items": users,
+            "size": limit,
+            "has_more": has_more,
+            "next_cursor": encode_rank_cursor(users[-1].rank, users[-1].id) if has_more else None,
+        }
+
     @staticmethod
     async def login_for_access_token(db: AsyncSession, email: str, password: str):
         result = await db.execute(select(User).where(User.email == email))
         user = result.scalar_one_or_none()
-        if not user or not user.verify_password(password):
+        if not user or not await verify_password_async(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Incorrect email or password.")
         if user.is_locked:
             raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
         if not user.email_verified:
             raise HTTPException(status_code=401, detail="Please verify your email address before logging in.")
+
+        await record_activity(db, user.id, user.created_at, datetime.now(timezone.utc))
+        await db.commit()
+        await user_cache.invalidate(user.id)
         return user
 
+    @staticmethod
+    async def upgrade_password_hash(user_id, password: str, old_hash: str) -> bool:
+        """Re-hash a password at the current cost factor; meant to run as a background task after login."""
+        new_hash = await hash_password_async(password)
+        session_factory = Database.get_session_factory()
+        async with session_factory() as db:
+            # Only replace the hash we verified, so a concurrent password change wins
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash, updated_at=User.updated_at)
+            )
+            await db.commit()
+        await user_cache.invalidate(user_id)
+        return result.rowcount == 1
+
     @staticmethod
     async def verify_email_with_token(db: AsyncSession, user_id: str, token: str) -> bool:
-        user = await UserService.get_user_by_id(db, user_id)
+        user = await UserService._get_user_for_write(db, user_id)
         if not user or user.verification_token != token:
             return False
         user.verify_email()
         await db.commit()
+        await user_cache.invalidate(user.id)
         return True
 
     @staticmethod
@@ -0,0 +1,32 @@
+from builtins import all, bool, bytearray, int, max, range, round, str
+import hashlib
+import math
+
+class BloomFilter:
+    """
+    Fixed-size set membership filter with no false negatives.
+
+    ``in`` may report an item that was never added (at roughly ``error_rate`` once
+    ``capacity`` items are stored) but never misses one that was.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
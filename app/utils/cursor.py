@@ -0,0 +1,83 @@
+from builtins import KeyError, TypeError, ValueError, float, len, str, tuple
+import base64
+import json
+import uuid
+from datetime import datetime
+
+def encode_cursor(key, user_id: uuid.UUID, direction: str = "next", sort: str = "created_at") -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor.
+
+    Args:
+        key (datetime | str): Sort key of the row the cursor points at.
+        user_id (UUID): Tie-breaker of the row the cursor points at.
+        direction (str): "next" to read rows after the position, "prev" to read rows before it.
+        sort (str): Ordering the position belongs to; the cursor is only valid for that ordering.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    payload = {"i": str(user_id), "d": direction}
+    if isinstance(key, datetime):
+        payload["c"] = key.isoformat()
+    else:
+        payload["k"] = key
+    if sort != "created_at":
+        payload["s"] = sort
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str = "created_at") -> tuple:
+    """
+    Decode a cursor produced by ``encode_cursor`` for the ``sort`` ordering.
+
+    Returns:
+        tuple: ``(key, user_id, direction)``.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another ordering.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        direction = payload.get("d", "next")
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        if payload.get("s", "created_at") != sort:
+            raise ValueError(payload.get("s"))
+        key = datetime.fromisoformat(payload["c"]) if "c" in payload else str(payload["k"])
+        return key, uuid.UUID(payload["i"]), direction
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_rank_cursor(rank: float, user_id: uuid.UUID) -> str:
+    """
+    Encode a position in relevance-ranked results (rank descending, then id descending).
+
+    Args:
+        rank (float): Relevance score of the row the cursor points at.
+        user_id (UUID): Tie-breaker of the row the cursor points at.
+
+    Returns:
+        str: The encoded cursor.
+    """
+    raw = json.dumps({"r": rank, "i": str(user_id)}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_rank_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor produced by ``encode_rank_cursor``.
+
+    Returns:
+        tuple: ``(rank, user_id)``.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return float(payload["r"]), uuid.UUID(payload["i"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,55 @@
+from builtins import TypeError, ValueError, bool, dict, int, list, str
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+def version_etag(updated_at: datetime) -> str:
+    """Strong ETag for a row version: its ``updated_at`` in microseconds, so it can be turned back into the timestamp."""
+    return f'"{(updated_at - _EPOCH) // _MICROSECOND:x}"'
+
+def etag_version(etag: str) -> Optional[datetime]:
+    """The ``updated_at`` an ETag from ``version_etag`` was built from, or None if it is not one of ours."""
+    if etag.startswith('W/'):
+        return None
+    try:
+        return _EPOCH + int(etag.strip('"'), 16) * _MICROSECOND
+    except ValueError:
+        return None
+
+def parse_etags(header: str) -> list:
+    """Split an If-Match / If-None-Match header into its entity tags (``*`` stays as is)."""
+    return [tag.strip() for tag in header.split(',') if tag.strip()]
+
+def etag_matches(header: str, etag: str, weak: bool = False) -> bool:
+    """
+    Whether ``etag`` satisfies the header; weak comparison (for If-None-Match) ignores ``W/``
+    prefixes, strong comparison (for If-Match) never matches a weak tag.
+    """
+    for tag in parse_etags(header):
+        if tag == '*':
+            return True
+        if weak:
+            tag = tag[2:] if tag.startswith('W/') else tag
+        if tag == etag:
+            return True
+    return False
+
+def last_modified(updated_at: datetime) -> str:
+    return format_datetime(updated_at.astimezone(timezone.utc), usegmt=True)
+
+def modified_since(header: str, updated_at: datetime) -> bool:
+    """Whether ``updated_at`` is later than an If-Modified-Since date (HTTP dates have one second resolution)."""
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return updated_at.replace(microsecond=0) > since
+
+def version_headers(updated_at: datetime) -> dict:
+    """ETag and Last-Modified headers for a row version."""
+    return {"ETag": version_etag(updated_at), "Last-Modified": last_modified(updated_at)}
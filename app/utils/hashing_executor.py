@@ -0,0 +1,124 @@
+# app/utils/hashing_executor.py
+from builtins import Exception, bool, dict, int, max, min, round
+import asyncio
+import os
+import time
+from logging import getLogger
+from app.settings.config import get_settings
+
+logger = getLogger(__name__)
+
+class HashingQueueFull(Exception):
+    """Raised when the hashing executor already holds ``workers + max_queue`` jobs."""
+
+class HashingExecutor:
+    """
+    Runs CPU-bound password hashing in a pool of worker processes so that bcrypt
+    never blocks the event loop.
+
+    Submissions are bounded: at most ``workers + max_queue`` jobs are handed to the
+    pool at once. Further callers are rejected with ``HashingQueueFull`` unless they
+    pass ``wait=True``, which background work uses to wait for a free slot instead.
+    Queue depth and latency metrics are exposed through ``stats()``.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = 64):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._pool = None
+        self._slots = None
+        self._loop = None
+        self._waiting = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+        self._max_latency = 0.0
+
+    def start(self):
+        """Create the worker pool. Safe to call more than once."""
+        if self._pool is None:
+            # Imported here: multiprocessing is slow to import and only needed once hashing starts
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info("Started hashing executor with %s workers", self.workers)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker pool and release its processes."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    async def run(self, func, *args, wait: bool = False):
+        """
+        Execute ``func(*args)`` in the pool and return its result.
+
+        Raises:
+            HashingQueueFull: If every slot is taken and ``wait`` is false.
+        """
+        if self._pool is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Semaphores are bound to the loop that first waits on them
+            self._slots = asyncio.Semaphore(self.workers + self.max_queue)
+            self._loop = loop
+        if not wait and self._slots.locked():
+            self._rejected += 1
+            raise HashingQueueFull(f"Hashing queue is full ({self.workers + self.max_queue} jobs)")
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        started_at = time.perf_counter()
+        self._in_flight += 1
+        try:
+            result = await loop.run_in_executor(self._pool, func, *args)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+            finished_at = time.perf_counter()
+            self._total_wait += started_at - queued_at
+            self._total_run += finished_at - started_at
+            self._max_latency = max(self._max_latency, finished_at - queued_at)
+        self._completed += 1
+        return result
+
+    def stats(self) -> dict:
+        """Return queue depth and latency metrics for the executor."""
+        finished = self._completed + self._failed
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self._waiting + max(0, self._in_flight - self.workers),
+            "in_flight": min(self._in_flight, self.workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._total_wait / finished * 1000, 3) if finished else 0.0,
+            "avg_run_ms": round(self._total_run / finished * 1000, 3) if finished else 0.0,
+            "max_latency_ms": round(self._max_latency * 1000, 3),
+        }
+
+
+_executor = None
+
+def get_hashing_executor() -> HashingExecutor:
+    """Return the process-wide hashing executor, configured from settings."""
+    global _executor
+    if _executor is None:
+        settings = get_settings()
+        _executor = HashingExecutor(settings.hashing_workers, settings.hashing_max_queue)
+    return _executor
@@ -1,8 +1,26 @@
-from builtins import str
+from builtins import len, list, min, range, str
+import re
+import secrets
+
+_INVALID_CHARS = re.compile(r'[^\w-]+')
+_BASE_LENGTH = 40  # leaves room for a suffix within the 50 character column
 
 def generate_nickname(email: str) -> str:
     """
     Generate a nickname based on the email address.
     Example: "jsmith@example.com" -> "jsmith"
     """
-    return email.split('@')[0]
+    local_part = _INVALID_CHARS.sub('_', email.split('@')[0]).strip('_')[:_BASE_LENGTH]
+    return local_part if len(local_part) >= 3 else f"{local_part}_user".lstrip('_')
+
+def nickname_candidates(email: str, count: int = 8) -> list:
+    """
+    Propose ``count`` nicknames for an email: the plain local part first, then variants with
+    random numeric suffixes that grow longer so popular names still find a free slot.
+    """
+    base = generate_nickname(email)
+    candidates = [base]
+    for i in range(1, count):
+        digits = min(3 + (i - 1) // 2, 9)
+        candidates.append(f"{base}_{secrets.randbelow(10 ** digits):0{digits}d}")
+    return candidates
@@ -0,0 +1,92 @@
+from builtins import bool, int, len, list, str, sum
+import sys
+from bisect import bisect_left
+
+SEPARATOR = "\x1f"
+
+class PrefixIndex:
+    """
+    Case-insensitive prefix lookup over string keys, each tagged with an ID.
+
+    Entries are ``"<lowercased key>\\x1f<id>"`` strings (followed by the original key when it
+    is not already lowercase) in a single sorted list, so a lookup is a binary search plus a
+    short scan and each entry costs one str object and one list slot. At most ``max_entries``
+    are held; once full, further keys are dropped and ``complete`` turns False.
+    """
+
+    def __init__(self, max_entries: int = 2000000):
+        self.max_entries = max_entries
+        self.complete = True
+        self._entries = []
+        self._entry_bytes = 0
+
+    @staticmethod
+    def _entry(key: str, item_id: str) -> str:
+        folded = key.lower()
+        if folded == key:
+            return f"{folded}{SEPARATOR}{item_id}"
+        return f"{folded}{SEPARATOR}{item_id}{SEPARATOR}{key}"
+
+    def _find(self, entry: str) -> int:
+        """Position of ``entry``, or -1 if it is not stored."""
+        i = bisect_left(self._entries, entry)
+        return i if i < len(self._entries) and self._entries[i] == entry else -1
+
+    def add(self, key: str, item_id: str) -> bool:
+        """Store ``key`` for ``item_id``; returns False if the index is full."""
+        entry = self._entry(key, item_id)
+        i = bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            return True
+        if len(self._entries) >= self.max_entries:
+            self.complete = False
+            return False
+        self._entries.insert(i, entry)
+        self._entry_bytes += sys.getsizeof(entry)
+        return True
+
+    def add_many(self, pairs) -> int:
+        """Store ``(key, item_id)`` pairs with one sort instead of an insert each; returns how many were added."""
+        entries = [entry for entry in {self._entry(key, item_id) for key, item_id in pairs} if self._find(entry) < 0]
+        room = self.max_entries - len(self._entries)
+        if len(entries) > room:
+            entries = entries[:room]
+            self.complete = False
+        self._entries.extend(entries)
+        # Timsort merges the appended run with the sorted list in linear time
+        self._entries.sort()
+        self._entry_bytes += sum(sys.getsizeof(entry) for entry in entries)
+        return len(entries)
+
+    def discard(self, key: str, item_id: str):
+        entry = self._entry(key, item_id)
+        i = self._find(entry)
+        if i >= 0:
+            del self._entries[i]
+            self._entry_bytes -= sys.getsizeof(entry)
+
+    def search(self, prefix: str, limit: int = 10) -> list:
+        """Up to ``limit`` ``(key, item_id)`` pairs whose key starts with ``prefix``, in key order."""
+        folded = prefix.lower()
+        results = []
+        i = bisect_left(self._entries, folded)
+        while i < len(self._entries) and len(results) < limit:
+            entry = self._entries[i]
+            if not entry.startswith(folded):
+                break
+            parts = entry.split(SEPARATOR)
+            results.append((parts[2] if len(parts) > 2 else parts[0], parts[1]))
+            i += 1
+        return results
+
+    def clear(self):
+        self._entries = []
+        self._entry_bytes = 0
+        self.complete = True
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index: the entry strings plus the list itself."""
+        return self._entry_bytes + sys.getsizeof(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,168 @@
+from builtins import bytes, dict, float, int, isinstance, len, list, min, str
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+class RateLimit:
+    """Token bucket allowing ``limit`` requests per ``period`` seconds, with bursts of up to ``limit``."""
+    __slots__ = ("limit", "period", "rate")
+
+    def __init__(self, limit: int, period: float = 60.0):
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period  # tokens regained per second
+
+class RateLimitRule:
+    """
+    Limits for one route: per client IP, and per account identifier taken from the request body
+    field ``account_field`` (form or JSON).
+    """
+
+    def __init__(self, per_ip: RateLimit = None, per_account: RateLimit = None, account_field: str = None):
+        self.per_ip = per_ip
+        self.per_account = per_account
+        self.account_field = account_field
+
+class RateLimitStore(ABC):
+    """Bucket storage; implement this over a shared store to enforce limits across processes."""
+
+    @abstractmethod
+    async def consume(self, key: str, limit: RateLimit) -> float:
+        """Take one token from ``key``'s bucket; return 0 if allowed, else seconds until one is available."""
+
+    async def clear(self):
+        """Drop every bucket; optional for shared stores."""
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Per-process buckets, least recently used evicted beyond ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    async def consume(self, key: str, limit: RateLimit) -> float:
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = limit.limit
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens = min(limit.limit, bucket[0] + (now - bucket[1]) * limit.rate)
+            self._buckets.move_to_end(key)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / limit.rate
+
+    async def clear(self):
+        self._buckets.clear()
+
+def _account_identifier(headers: dict, body: bytes, field: str):
+    content_type = headers.get(b"content-type", b"")
+    try:
+        if content_type.startswith(b"application/json"):
+            value = json.loads(body).get(field)
+        else:
+            value = parse_qs(body.decode("utf-8")).get(field, [None])[0]
+    except (ValueError, AttributeError):
+        return None
+    return value.strip().lower() if isinstance(value, str) else None
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that answers 429 for POSTs to limited routes before the application (and
+    so any database or bcrypt work) runs. It is plain ASGI rather than ``BaseHTTPMiddleware``
+    to keep the per-request overhead to a few dictionary lookups.
+    """
+
+    def __init__(self, app, rules: dict, store: RateLimitStore, trust_forwarded: bool = False, max_body: int = 16384):
+        self.app = app
+        self.rules = rules  # path -> RateLimitRule
+        self.store = store
+        self.trust_forwarded = trust_forwarded
+        # Bodies are read before authentication, so anyone can send one; larger ones get 413
+        self.max_body = max_body
+
+    async def __call__(self, scope, receive, send):
+        rule = self.rules.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        if rule.per_ip is not None:
+            retry_after = await self.store.consume(f"ip:{scope['path']}:{self._client_ip(scope)}", rule.per_ip)
+            if retry_after:
+                await self._reject(send, retry_after)
+                return
+
+        if rule.per_account is not None:
+            body = await self._read_body(receive, self.max_body)
+            if body is None:
+                await self._send_json(send, 413, b'{"detail":"Request body too large"}')
+                return
+            receive = self._replay(body, receive)
+            identifier = _account_identifier(dict(scope["headers"]), body, rule.account_field)
+            if identifier:
+                retry_after = await self.store.consume(f"account:{scope['path']}:{identifier}", rule.per_account)
+                if retry_after:
+                    await self._reject(send, retry_after)
+                    return
+
+        await self.app(scope, receive, send)
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    @staticmethod
+    async def _read_body(receive, limit: int) -> bytes:
+        """The request body, or None as soon as it grows past ``limit`` bytes."""
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > limit:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    @staticmethod
+    def _replay(body: bytes, receive):
+        """Hand the already-read body to the application, then fall through to the real channel."""
+        pending = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def replay():
+            return pending.pop() if pending else await receive()
+        return replay
+
+    @classmethod
+    async def _reject(cls, send, retry_after: float):
+        await cls._send_json(send, 429, b'{"detail":"Too many requests"}', [(b"retry-after", str(int(retry_after) + 1).encode())])
+
+    @staticmethod
+    async def _send_json(send, status: int, body: bytes, headers: list = ()):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+rate_limit_store = InMemoryRateLimitStore()
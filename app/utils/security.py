@@ -1,19 +1,74 @@
 # app/security.py
 from builtins import Exception, ValueError, bool, int, str
 import secrets
-import bcrypt
+import time
 from logging import getLogger
+from app.settings.config import get_settings
+from app.utils.hashing_executor import get_hashing_executor
 
 # Set up logging
 logger = getLogger(__name__)
 
-def hash_password(password: str, rounds: int = 12) -> str:
+# Active bcrypt cost factor; resolved from settings on first use or set by calibration
+_bcrypt_rounds = None
+
+def get_bcrypt_rounds() -> int:
+    """Return the cost factor used for new password hashes."""
+    global _bcrypt_rounds
+    if _bcrypt_rounds is None:
+        _bcrypt_rounds = get_settings().bcrypt_rounds
+    return _bcrypt_rounds
+
+def set_bcrypt_rounds(rounds: int):
+    """Override the cost factor used for new password hashes."""
+    global _bcrypt_rounds
+    _bcrypt_rounds = rounds
+
+def calibrate_bcrypt_rounds(target_ms: int, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Finds the highest bcrypt cost factor whose hashing time stays within a target latency.
+
+    Each extra round doubles the work, so the cost is measured once at ``min_rounds``
+    and extrapolated from there.
+
+    Args:
+        target_ms (int): The maximum acceptable time for one hash, in milliseconds.
+        min_rounds (int): The lowest cost factor that will ever be returned.
+        max_rounds (int): The highest cost factor that will ever be returned.
+
+    Returns:
+        int: The calibrated cost factor.
+    """
+    import bcrypt
+
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=min_rounds))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+def get_hash_rounds(hashed_password: str) -> int:
+    """Return the cost factor a bcrypt hash was created with."""
+    try:
+        return int(hashed_password.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Check whether a stored hash was created with an outdated cost factor."""
+    return get_hash_rounds(hashed_password) < get_bcrypt_rounds()
+
+def hash_password(password: str, rounds: int = None) -> str:
     """
     Hashes a password using bcrypt with a specified cost factor.
     
     Args:
         password (str): The plain text password to hash.
         rounds (int): The cost factor that determines the computational cost of hashing.
+            Defaults to the configured cost factor.
 
     Returns:
         str: The hashed password.
@@ -21,6 +76,10 @@ def hash_password(password: str, rounds: int = 12) -> str:
     Raises:
         ValueError: If hashing the password fails.
     """
+    import bcrypt
+
+    if rounds is None:
+        rounds = get_bcrypt_rounds()
     try:
         salt = bcrypt.gensalt(rounds=rounds)
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
@@ -43,11 +102,39 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Raises:
         ValueError: If the hashed password format is incorrect or the function fails to verify.
     """
+    import bcrypt
+
     try:
         return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
     except Exception as e:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
 
+async def hash_password_async(password: str, rounds: int = None, wait: bool = False) -> str:
+    """
+    Awaitable variant of ``hash_password`` that runs bcrypt in the hashing executor
+    instead of on the event loop. Pass ``wait=True`` to queue for a free slot
+    instead of failing fast when the executor is full.
+
+    Raises:
+        ValueError: If hashing the password fails.
+        HashingQueueFull: If the executor is full and ``wait`` is false.
+    """
+    # Resolve the cost here: worker processes do not see calibration done after they forked
+    if rounds is None:
+        rounds = get_bcrypt_rounds()
+    return await get_hashing_executor().run(hash_password, password, rounds, wait=wait)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Awaitable variant of ``verify_password`` that runs bcrypt in the hashing executor
+    instead of on the event loop.
+
+    Raises:
+        ValueError: If the hashed password format is incorrect or the function fails to verify.
+        HashingQueueFull: If the executor is full.
+    """
+    return await get_hashing_executor().run(verify_password, plain_password, hashed_password)
+
 def generate_verification_token():
     return secrets.token_urlsafe(16)  # Generates a secure 16-byte URL-safe token
\ No newline at end of file
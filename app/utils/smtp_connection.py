@@ -1,31 +1,146 @@
 # smtp_client.py
-from builtins import Exception, int, str
-import smtplib
+from builtins import ConnectionError, Exception, int, len, list, range, str
+import asyncio
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.settings.config import settings
 import logging
 
+class SMTPConnectionPool:
+    """
+    Keeps authenticated SMTP connections open and hands them out for reuse, so that
+    consecutive messages skip the connect, STARTTLS and LOGIN round trips.
+
+    Connections idle for longer than ``idle_timeout`` seconds are closed instead of reused.
+    aiosmtplib is imported on the first send rather than with the application.
+    """
+
+    def __init__(self, server: str, port: int, username: str = None, password: str = None,
+                 pool_size: int = 4, idle_timeout: float = 30.0, send_timeout: float = 10.0,
+                 use_tls: bool = True):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self.use_tls = use_tls
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._slots = None
+        self._loop = None
+        self.connections_opened = 0
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        import aiosmtplib
+
+        connection = aiosmtplib.SMTP(
+            hostname=self.server, port=self.port, timeout=self.send_timeout, start_tls=self.use_tls
+        )
+        await connection.connect()
+        if self.password:
+            await connection.login(self.username, self.password)
+        self.connections_opened += 1
+        return connection
+
+    async def _close(self, connection: "aiosmtplib.SMTP"):
+        try:
+            await connection.quit()
+        except Exception:
+            connection.close()
+
+    async def _acquire(self) -> "aiosmtplib.SMTP":
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Connections and semaphores cannot cross event loops
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.pool_size)
+            self._loop = loop
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                if time.monotonic() - last_used <= self.idle_timeout and connection.is_connected:
+                    return connection
+                await self._close(connection)
+            return await self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, connection: "aiosmtplib.SMTP", reusable: bool = True):
+        if reusable and connection.is_connected:
+            self._idle.append((connection, time.monotonic()))
+        else:
+            connection.close()
+        self._slots.release()
+
+    async def send(self, message, sender: str, recipients: list):
+        """Send one message on a pooled connection, retrying once on a stale connection."""
+        import aiosmtplib
+
+        for attempt in range(2):
+            connection = await self._acquire()
+            try:
+                await connection.send_message(
+                    message, sender=sender, recipients=recipients, timeout=self.send_timeout
+                )
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError):
+                self._release(connection, reusable=False)
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self._release(connection, reusable=False)
+                raise
+            self._release(connection)
+            return
+
+    async def close(self):
+        """Close every idle connection."""
+        idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            await self._close(connection)
+
+
 class SMTPClient:
-    def __init__(self, server: str, port: int, username: str, password: str):
+    def __init__(self, server: str, port: int, username: str, password: str,
+                 pool_size: int = None, idle_timeout: float = None, send_timeout: float = None,
+                 use_tls: bool = None):
         self.server = server
         self.port = port
         self.username = username
         self.password = password
+        self.pool = SMTPConnectionPool(
+            server, port, username, password,
+            pool_size=pool_size or settings.smtp_pool_size,
+            idle_timeout=idle_timeout if idle_timeout is not None else settings.smtp_idle_timeout,
+            send_timeout=send_timeout if send_timeout is not None else settings.smtp_send_timeout,
+            use_tls=use_tls if use_tls is not None else settings.smtp_use_tls,
+        )
+
+    def _build_message(self, subject: str, html_content: str, recipient: str) -> MIMEMultipart:
+        message = MIMEMultipart('alternative')
+        message['Subject'] = subject
+        message['From'] = self.username
+        message['To'] = recipient
+        message.attach(MIMEText(html_content, 'html'))
+        return message
 
-    def send_email(self, subject: str, html_content: str, recipient: str):
+    async def send_email(self, subject: str, html_content: str, recipient: str):
         try:
-            message = MIMEMultipart('alternative')
-            message['Subject'] = subject
-            message['From'] = self.username
-            message['To'] = recipient
-            message.attach(MIMEText(html_content, 'html'))
-
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()  # Use TLS
-                server.login(self.username, self.password)
-                server.sendmail(self.username, recipient, message.as_string())
+            message = self._build_message(subject, html_content, recipient)
+            await self.pool.send(message, self.username, [recipient])
             logging.info(f"Email sent to {recipient}")
         except Exception as e:
             logging.error(f"Failed to send email: {str(e)}")
             raise
+
+    async def send_bulk(self, messages: list) -> int:
+        """Send ``(subject, html_content, recipient)`` tuples concurrently over the pool; returns the number sent."""
+        await asyncio.gather(*(self.send_email(*message) for message in messages))
+        return len(messages)
+
+    async def close(self):
+        await self.pool.close()
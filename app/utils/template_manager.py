@@ -1,11 +1,35 @@
-import markdown2
+import html
+import os
+import re
+import string
 from pathlib import Path
 
+# Inline styles applied to bare tags; the body style wraps the whole document
+EMAIL_STYLES = {
+    'body': 'font-family: Arial, sans-serif; font-size: 16px; color: #333333; background-color: #ffffff; line-height: 1.5;',
+    'h1': 'font-size: 24px; color: #333333; font-weight: bold; margin-top: 20px; margin-bottom: 10px;',
+    'p': 'font-size: 16px; color: #666666; margin: 10px 0; line-height: 1.6;',
+    'a': 'color: #0056b3; text-decoration: none; font-weight: bold;',
+    'footer': 'font-size: 12px; color: #777777; padding: 20px 0;',
+    'ul': 'list-style-type: none; padding: 0;',
+    'li': 'margin-bottom: 10px;'
+}
+_STYLED_TAG = re.compile('<(' + '|'.join(tag for tag in EMAIL_STYLES if tag != 'body') + ')>')
+
 class TemplateManager:
+    """
+    Renders Markdown email templates to styled HTML.
+
+    Each template is compiled once, together with the shared header and footer, into an
+    HTML format string; rendering then only substitutes the context values. A compiled
+    template is rebuilt when any of its source files changes on disk.
+    """
+
     def __init__(self):
         # Dynamically determine the root path of the project
         self.root_dir = Path(__file__).resolve().parent.parent.parent  # Adjust this depending on the structure
         self.templates_dir = self.root_dir / 'email_templates'
+        self._compiled = {}  # template name -> (source mtimes, compiled HTML format string)
 
     def _read_template(self, filename: str) -> str:
         """Private method to read template content."""
@@ -15,32 +39,67 @@ class TemplateManager:
 
     def _apply_email_styles(self, html: str) -> str:
         """Apply advanced CSS styles inline for email compatibility with excellent typography."""
-        styles = {
-            'body': 'font-family: Arial, sans-serif; font-size: 16px; color: #333333; background-color: #ffffff; line-height: 1.5;',
-            'h1': 'font-size: 24px; color: #333333; font-weight: bold; margin-top: 20px; margin-bottom: 10px;',
-            'p': 'font-size: 16px; color: #666666; margin: 10px 0; line-height: 1.6;',
-            'a': 'color: #0056b3; text-decoration: none; font-weight: bold;',
-            'footer': 'font-size: 12px; color: #777777; padding: 20px 0;',
-            'ul': 'list-style-type: none; padding: 0;',
-            'li': 'margin-bottom: 10px;'
-        }
         # Wrap entire HTML content in <div> with body style
-        styled_html = f'<div style="{styles["body"]}">{html}</div>'
-        # Apply styles to each HTML element
-        for tag, style in styles.items():
-            if tag != 'body':  # Skip the body style since it's already applied to the <div>
-                styled_html = styled_html.replace(f'<{tag}>', f'<{tag} style="{style}">')
-        return styled_html
+        styled_html = f'<div style="{EMAIL_STYLES["body"]}">{html}</div>'
+        # Apply styles to every bare element in a single pass
+        return _STYLED_TAG.sub(lambda match: f'<{match.group(1)} style="{EMAIL_STYLES[match.group(1)]}">', styled_html)
 
-    def render_template(self, template_name: str, **context) -> str:
-        """Render a markdown template with given context, applying advanced email styles."""
-        header = self._read_template('header.md')
-        footer = self._read_template('footer.md')
+    def _source_mtimes(self, template_name: str) -> tuple:
+        return tuple(
+            os.stat(self.templates_dir / filename).st_mtime_ns
+            for filename in ('header.md', f'{template_name}.md', 'footer.md')
+        )
+
+    def _compile(self, template_name: str) -> str:
+        """Render header, template and footer to styled HTML, keeping the template's fields as placeholders."""
+        import markdown2  # only needed when a template is (re)compiled
 
-        # Read main template and format it with provided context
         main_template = self._read_template(f'{template_name}.md')
-        main_content = main_template.format(**context)
 
+        # Swap each replacement field for an inert token so Markdown leaves it untouched
+        fields = {}
+        parts = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(main_template):
+            parts.append(literal)
+            if field_name is not None:
+                token = f'TEMPLATEFIELD{len(fields)}X'
+                fields[token] = '{' + field_name + (f'!{conversion}' if conversion else '') + (f':{format_spec}' if format_spec else '') + '}'
+                parts.append(token)
+        main_content = ''.join(parts)
+
+        header = self._read_template('header.md')
+        footer = self._read_template('footer.md')
         full_markdown = f"{header}\n{main_content}\n{footer}"
-        html_content = markdown2.markdown(full_markdown)
-        return self._apply_email_styles(html_content)
+        html_content = self._apply_email_styles(markdown2.markdown(full_markdown))
+
+        # Escape literal braces, then restore the fields for str.format
+        compiled = html_content.replace('{', '{{').replace('}', '}}')
+        for token, field in fields.items():
+            compiled = compiled.replace(token, field)
+        return compiled
+
+    def get_compiled_template(self, template_name: str) -> str:
+        """Return the compiled form of a template, recompiling it if a source file changed."""
+        mtimes = self._source_mtimes(template_name)
+        cached = self._compiled.get(template_name)
+        if cached is None or cached[0] != mtimes:
+            cached = (mtimes, self._compile(template_name))
+            self._compiled[template_name] = cached
+        return cached[1]
+
+    def render_template(self, template_name: str, **context) -> str:
+        """Render a markdown template with given context, applying advanced email styles."""
+        compiled = self.get_compiled_template(template_name)
+        # Values are inserted into HTML, so escape them as Markdown would have
+        escaped = {key: html.escape(value) if isinstance(value, str) else value for key, value in context.items()}
+        return compiled.format(**escaped)
+
+
+_template_manager = None
+
+def get_template_manager() -> TemplateManager:
+    """Return the process-wide template manager so compiled templates are shared."""
+    global _template_manager
+    if _template_manager is None:
+        _template_manager = TemplateManager()
+    return _template_manager
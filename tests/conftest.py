@@ -17,7 +17,9 @@ from sqlalchemy import select
 from app.main import app
 from app.database import Base, Database
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_read_db, get_settings
+from app.services.user_autocomplete import user_autocomplete
+from app.utils.rate_limiter import rate_limit_store
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
@@ -59,6 +61,26 @@ async def setup_database():
         await conn.run_sync(Base.metadata.drop_all)
     await engine.dispose()
 
+@pytest.fixture(scope="function", autouse=True)
+async def reset_rate_limits():
+    """Start every test with empty rate limit buckets."""
+    await rate_limit_store.clear()
+
+@pytest.fixture(scope="function", autouse=True)
+def reset_autocomplete():
+    """Start every test with an empty, not yet loaded autocomplete index."""
+    user_autocomplete.clear()
+
+@pytest.fixture(scope="function")
+async def app_database(setup_database):
+    """Give the application's Database a fresh engine bound to this test's event loop."""
+    original = (Database._engine, Database._session_factory)
+    Database._engine = None
+    Database.initialize(settings.database_url)
+    yield Database
+    await Database._engine.dispose()
+    Database._engine, Database._session_factory = original
+
 @pytest.fixture(scope="function")
 async def db_session(setup_database):
     async with AsyncSessionScoped() as session:
@@ -71,6 +93,7 @@ async def db_session(setup_database):
 async def async_client(db_session):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
         app.dependency_overrides[get_db] = lambda: db_session
+        app.dependency_overrides[get_read_db] = lambda: db_session
         try:
             yield client
         finally:
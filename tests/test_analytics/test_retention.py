@@ -1,6 +1,13 @@
+import asyncio
+from datetime import date, datetime, timedelta, timezone
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+from app.analytics.analytics_service import get_user_retention, record_activity, record_signup, week_start
+from app.database import Database
 from app.main import app
+from app.models.cohort_retention_model import CohortRetention
+from app.services.user_service import UserService
 
 # Test: Check if /analytics/retention returns 200 OK
 @pytest.mark.asyncio
@@ -16,3 +23,76 @@ async def test_docs_accessible():
         response = await ac.get("/docs")
     assert response.status_code == 200
 
+def test_week_start_is_utc_monday():
+    assert week_start(datetime(2024, 3, 13, 12, tzinfo=timezone.utc)) == date(2024, 3, 11)
+    # Sunday evening in UTC-5 is already Monday in UTC
+    assert week_start(datetime(2024, 3, 17, 21, tzinfo=timezone(timedelta(hours=-5)))) == date(2024, 3, 18)
+
+@pytest.mark.asyncio
+async def test_activity_counted_once_per_week(db_session, user):
+    now = datetime.now(timezone.utc)
+    signup = now - timedelta(weeks=2)
+    await record_signup(db_session, signup)
+    assert not await record_activity(db_session, user.id, signup, signup)  # same week as signup
+    assert await record_activity(db_session, user.id, signup, now)
+    assert not await record_activity(db_session, user.id, signup, now)  # second login this week
+    await db_session.commit()
+
+    rows = (await db_session.execute(select(CohortRetention))).scalars().all()
+    assert {(row.week_offset, row.active_users) for row in rows} == {(0, 1), (2, 1)}
+
+@pytest.mark.asyncio
+async def test_get_user_retention_by_cohort(db_session, user):
+    now = datetime.now(timezone.utc)
+    old_signup = now - timedelta(weeks=1)
+    for _ in range(4):
+        await record_signup(db_session, old_signup)
+    await record_activity(db_session, user.id, old_signup, now)
+    await record_signup(db_session, now)
+    await db_session.commit()
+
+    retention = await get_user_retention(db_session)
+    assert retention["total_signups"] == 5
+    first, second = retention["cohorts"]
+    assert first["cohort_week"] == week_start(old_signup).isoformat()
+    assert first["signups"] == 4
+    assert first["retention"] == [
+        {"week": 0, "active_users": 4, "retention_rate": 100.0},
+        {"week": 1, "active_users": 1, "retention_rate": 25.0},
+    ]
+    assert second["signups"] == 1
+
+    assert (await get_user_retention(db_session, cohorts=1))["total_signups"] == 1
+
+@pytest.mark.asyncio
+async def test_registration_and_login_update_rollup(db_session, verified_user):
+    await UserService.register_user(db_session, {"email": "cohort@example.com", "password": "MySuperPassword$1234"})
+    retention = await get_user_retention(db_session)
+    assert retention["total_signups"] == 1
+
+    # Last login a week before this one, so this login counts as new weekly activity
+    verified_user.created_at = datetime.now(timezone.utc) - timedelta(weeks=3)
+    verified_user.last_login_at = datetime.now(timezone.utc) - timedelta(weeks=1)
+    await db_session.commit()
+    user = await UserService.login_for_access_token(db_session, verified_user.email, "MySuperPassword$1234")
+    assert user.last_login_at > datetime.now(timezone.utc) - timedelta(minutes=1)
+    row = (await db_session.execute(
+        select(CohortRetention).where(CohortRetention.week_offset == 3)
+    )).scalar_one()
+    assert row.active_users == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_logins_count_once(app_database, db_session, verified_user):
+    verified_user.created_at = datetime.now(timezone.utc) - timedelta(weeks=3)
+    verified_user.last_login_at = datetime.now(timezone.utc) - timedelta(weeks=1)
+    await db_session.commit()
+
+    async def login():
+        async with Database.get_session_factory()() as session:
+            await UserService.login_for_access_token(session, verified_user.email, "MySuperPassword$1234")
+
+    await asyncio.gather(login(), login(), login())
+    rows = (await db_session.execute(
+        select(CohortRetention).where(CohortRetention.week_offset == 3)
+    )).scalars().all()
+    assert [row.active_users for row in rows] == [1]
@@ -0,0 +1,62 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette.requests import Request
+from app.database import Database
+from app.dependencies import get_db
+from app.main import app
+from app.settings.config import settings
+
+pytestmark = pytest.mark.asyncio
+
+async def test_readiness_reports_pool(async_client, app_database):
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database"] == "ok"
+    pool = body["pool"]
+    assert pool["checked_out"] == 0
+    assert pool["idle"] >= 1
+    assert pool["checkouts"] >= 1
+    assert pool["max_wait_ms"] >= pool["avg_wait_ms"] >= 0
+
+async def test_initialize_applies_pool_settings():
+    original = (Database._engine, Database._session_factory)
+    Database._engine = None
+    try:
+        Database.initialize(settings.database_url, pool_size=3, max_overflow=2, pool_timeout=5, pool_recycle=60)
+        pool = Database._engine.pool
+        assert pool.size() == 3
+        assert pool._max_overflow == 2
+        assert pool._timeout == 5
+        assert pool._recycle == 60
+        assert Database.pool_status() == {"size": 3, "checked_out": 0, "idle": 0, "overflow": 0}
+        await Database._engine.dispose()
+    finally:
+        Database._engine, Database._session_factory = original
+
+async def test_get_db_records_checkout_latency(app_database):
+    request = Request({"type": "http", "headers": []})
+    before = Database.checkout_metrics.count
+    dependency = get_db(request)
+    session = await dependency.__anext__()
+    await session.execute(text("SELECT 1"))
+    assert Database.pool_status()["checked_out"] == 1
+    await dependency.aclose()
+    assert Database.pool_status()["checked_out"] == 0
+    assert request.state.db_checkout_ms >= 0
+    assert Database.checkout_metrics.count == before + 1
+
+async def test_checkout_latency_reported_in_server_timing(app_database, user, admin_token):
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get(f"/users/{user.id}", headers={"Authorization": f"Bearer {admin_token}"})
+        assert response.status_code == 200
+        name, duration = response.headers["server-timing"].split(";")
+        assert name == "db-checkout"
+        assert float(duration.removeprefix("dur=")) >= 0
+
+        # Requests that never open a session carry no database timing
+        response = await client.get("/docs")
+        assert "server-timing" not in response.headers
+
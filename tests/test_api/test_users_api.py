@@ -1,9 +1,13 @@
 # --- test_users_api.py (Corrected) ---
 
+import asyncio
 import pytest
 from httpx import AsyncClient
 from app.main import app
 from urllib.parse import urlencode
+from app.services.user_autocomplete import user_autocomplete
+from app.settings.config import settings
+from app.utils.hashing_executor import HashingQueueFull
 
 pytestmark = pytest.mark.asyncio
 
@@ -48,8 +52,213 @@ async def test_create_user_duplicate_email(async_client, verified_user):
     response = await async_client.post("/register/", json=user_data)
     assert response.status_code in [400, 409]
 
+@pytest.mark.asyncio
+async def test_register_returns_503_when_hashing_queue_is_full(async_client, monkeypatch):
+    async def full(*args, **kwargs):
+        raise HashingQueueFull("full")
+
+    monkeypatch.setattr("app.services.user_service.hash_password_async", full)
+    user_data = {"nickname": "busy_user", "email": "busy@example.com", "password": "Password123!"}
+    response = await async_client.post("/register/", json=user_data)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+@pytest.mark.asyncio
+async def test_admin_creates_user(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    user_data = {"email": "created@example.com", "password": "Password123!", "nickname": "created_by_admin"}
+    response = await async_client.post("/users/", json=user_data, headers=headers)
+    assert response.status_code == 201
+    assert response.json()["nickname"] == "created_by_admin"
+
 @pytest.mark.asyncio
 async def test_delete_user_does_not_exist(async_client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     response = await async_client.delete("/users/00000000-0000-0000-0000-000000000000", headers=headers)
     assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_list_users_cursor_mode(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/", params={"cursor": "", "limit": 20}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 20
+    assert body["next_cursor"] is not None
+    response = await async_client.get("/users/", params={"cursor": body["next_cursor"], "limit": 20}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["prev_cursor"] is not None
+
+@pytest.mark.asyncio
+async def test_list_users_filter_and_sort(async_client, admin_token, admin_user, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/", params={"role": "ADMIN", "fields": "email"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["items"] == [{"id": str(admin_user.id), "email": admin_user.email}]
+    assert response.json()["total"] == 1
+
+    response = await async_client.get("/users/", params={"sort": "-email", "cursor": "", "limit": 5}, headers=headers)
+    emails = [item["email"] for item in response.json()["items"]]
+    assert emails == sorted(emails, reverse=True)
+
+    response = await async_client.get("/users/", params={"sort": "hashed_password"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_list_users_invalid_cursor(async_client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/", params={"cursor": "garbage"}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_bulk_import_users(async_client, app_database, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"}
+    body = "email,password\nbulk1@example.com,Secret*123\nbulk2@example.com,Secret*123\nbroken,Secret*123\n"
+    response = await async_client.post("/users/import", content=body, headers=headers)
+    assert response.status_code == 202
+    assert response.json()["status"] == "running"
+    assert response.headers["Location"].endswith(f"/users/import/{response.json()['id']}")
+
+    for _ in range(100):
+        report = (await async_client.get(response.headers["Location"], headers=headers)).json()
+        if report["status"] != "running":
+            break
+        await asyncio.sleep(0.05)
+    assert report["status"] == "completed"
+    assert report["imported"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["row"] == 3
+    missing = await async_client.get("/users/import/unknown", headers=headers)
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_bulk_import_requires_admin(async_client, manager_token):
+    response = await async_client.post("/users/import", content="", headers={"Authorization": f"Bearer {manager_token}"})
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_export_users_stream(async_client, app_database, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/export?format=csv&fields=email,role", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.splitlines()[0] == "email,role"
+    assert len(response.text.splitlines()) == 2  # header and the admin
+
+    response = await async_client.get("/users/export?fields=hashed_password", headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete_users(async_client, admin_token, user, verified_user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.post("/users/bulk/update", json={
+        "filter": {"ids": [str(user.id), str(verified_user.id)]}, "changes": {"is_professional": True}
+    }, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2}
+
+    response = await async_client.post("/users/bulk/delete", json={
+        "ids": [str(user.id), str(verified_user.id)], "email_verified": False
+    }, headers=headers)
+    assert response.json() == {"affected": 1}
+
+    response = await async_client.post("/users/bulk/delete", json={}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_account(async_client, verified_user):
+    form_data = urlencode({"username": verified_user.email, "password": "WrongPassword!"})
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    statuses = [
+        (await async_client.post("/login/", data=form_data, headers=headers)).status_code
+        for _ in range(settings.rate_limit_login_per_account + 1)
+    ]
+    assert statuses[:-1] == [401] * settings.rate_limit_login_per_account
+    assert statuses[-1] == 429
+
+@pytest.mark.asyncio
+async def test_get_user_conditional(async_client, admin_token, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get(f"/users/{user.id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await async_client.get(f"/users/{user.id}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = await async_client.get(f"/users/{user.id}", headers={**headers, "If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+    last_modified = response.headers["last-modified"]
+    response = await async_client.get(f"/users/{user.id}", headers={**headers, "If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+@pytest.mark.asyncio
+async def test_update_user_if_match(async_client, admin_token, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    etag = (await async_client.get(f"/users/{user.id}", headers=headers)).headers["etag"]
+
+    response = await async_client.put(f"/users/{user.id}", json={"first_name": "First"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["first_name"] == "First"
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+
+    # A writer still holding the old version is refused
+    response = await async_client.put(f"/users/{user.id}", json={"first_name": "Second"}, headers={**headers, "If-Match": etag})
+    assert response.status_code == 412
+    response = await async_client.get(f"/users/{user.id}", headers=headers)
+    assert response.json()["first_name"] == "First"
+    assert response.headers["etag"] == new_etag
+
+@pytest.mark.asyncio
+async def test_list_users_sparse_fields(async_client, admin_token, users_with_same_role_50_users):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/", params={"fields": "email,nickname", "limit": 5}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 5
+    assert all(set(item) == {"id", "email", "nickname"} for item in body["items"])
+    assert body["has_more"] is True
+
+    response = await async_client.get("/users/", params={"fields": "role", "cursor": "", "limit": 5}, headers=headers)
+    assert set(response.json()["items"][0]) == {"id", "role"}
+    assert response.json()["next_cursor"] is not None
+
+@pytest.mark.asyncio
+async def test_get_user_sparse_fields(async_client, admin_token, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get(f"/users/{user.id}", params={"fields": "first_name"}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"id": str(user.id), "first_name": user.first_name}
+    assert "etag" in response.headers
+
+    response = await async_client.get(f"/users/{user.id}", params={"fields": "hashed_password"}, headers=headers)
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_search_users(async_client, admin_token, user):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = await async_client.get("/users/search", params={"q": user.email.split("@")[0], "fields": "email"}, headers=headers)
+    assert response.status_code == 200
+    assert {"id": str(user.id), "email": user.email} in response.json()["items"]
+
+    response = await async_client.get("/users/search", params={"q": "a"}, headers=headers)
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_autocomplete_users(async_client, admin_token, user, db_session):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    prefix = user.nickname[:3]
+    # Until the index is loaded the database answers
+    response = await async_client.get("/users/autocomplete", params={"q": prefix}, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["source"] == "database"
+
+    await user_autocomplete.warm(db_session)
+    response = await async_client.get("/users/autocomplete", params={"q": prefix}, headers=headers)
+    body = response.json()
+    assert body["source"] == "memory"
+    assert {"id": str(user.id), "value": user.nickname} in body["items"]
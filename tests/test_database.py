@@ -0,0 +1,77 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from starlette.requests import Request
+from app.database import Database
+from app.dependencies import READ_PRIMARY_COOKIE, get_db, get_read_db
+from app.main import app
+from app.models.user_model import User
+from app.settings.config import settings
+
+@pytest.fixture
+async def replicas(app_database):
+    # Both "replicas" point at the test database; routing is what is under test
+    Database.initialize_replicas([settings.database_url, settings.database_url])
+    yield Database._replicas
+    await Database.dispose_replicas()
+
+def make_request(cookie: str = None) -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "headers": headers})
+
+async def test_reads_use_primary_without_replicas(app_database):
+    assert Database.get_read_session_factory() is Database.get_session_factory()
+
+async def test_round_robin_replica_selection(replicas):
+    factories = [replica[1] for replica in replicas]
+    picks = [Database.get_read_session_factory() for _ in range(4)]
+    assert picks == factories + factories
+
+async def test_least_connections_replica_selection(replicas):
+    Database._replica_selection = "least_connections"
+    first, second = [replica[1] for replica in replicas]
+    async with first() as session:
+        await session.execute(text("SELECT 1"))
+        assert Database.get_read_session_factory() is second
+    assert len(Database.replica_pool_status()) == 2
+
+async def test_unknown_replica_selection_rejected(app_database):
+    with pytest.raises(ValueError):
+        Database.initialize_replicas([settings.database_url], selection="random")
+
+async def test_read_db_uses_replica(replicas):
+    dependency = get_read_db(make_request())
+    session = await dependency.__anext__()
+    assert session.bind is replicas[0][0]
+    assert session.info["replica"] is True
+    await dependency.aclose()
+
+async def test_read_db_uses_primary_after_write(replicas):
+    dependency = get_read_db(make_request(f"{READ_PRIMARY_COOKIE}=1"))
+    session = await dependency.__anext__()
+    assert session.bind is Database._engine
+    await dependency.aclose()
+
+async def test_write_commit_marks_read_primary(app_database, user):
+    request = make_request()
+    dependency = get_db(request)
+    session = await dependency.__anext__()
+    await session.execute(select(User).where(User.id == user.id))
+    await session.commit()
+    assert not getattr(request.state, "read_primary", False)
+
+    db_user = (await session.execute(select(User).where(User.id == user.id))).scalar_one()
+    db_user.first_name = "Changed"
+    await session.commit()
+    assert request.state.read_primary
+    await dependency.aclose()
+
+async def test_read_primary_cookie_set_on_endpoint_built_response(app_database, user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.get(f"/users/{user.id}", headers=headers)
+        assert READ_PRIMARY_COOKIE not in response.headers.get("set-cookie", "")
+        # delete_user returns its own Response(204)
+        response = await client.delete(f"/users/{user.id}", headers=headers)
+    assert response.status_code == 204
+    assert f"{READ_PRIMARY_COOKIE}=1" in response.headers["set-cookie"]
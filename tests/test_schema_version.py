@@ -0,0 +1,55 @@
+import logging
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from app.database import Database
+from app.schema_version import SchemaVersionError, check_schema_version, current_revisions, head_revisions
+from app.settings.config import Settings
+
+@pytest.fixture
+async def alembic_version(app_database):
+    async with Database._engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) PRIMARY KEY)"))
+    yield
+    async with Database._engine.begin() as conn:
+        await conn.execute(text("DROP TABLE alembic_version"))
+
+def test_head_revision_comes_from_the_migration_scripts():
+    assert head_revisions() == {"c2e8b4a61d37"}
+
+async def test_unmigrated_database_is_refused(app_database):
+    async with Database._engine.connect() as conn:
+        assert await current_revisions(conn) == set()
+    async with Database._engine.connect() as conn:
+        with pytest.raises(SchemaVersionError, match="no revision"):
+            await check_schema_version(conn, "error")
+
+class InsufficientPrivilege(Exception):
+    pgcode = "42501"
+
+class DeniedConnection:
+    async def execute(self, statement):
+        raise ProgrammingError(str(statement), {}, InsufficientPrivilege())
+
+async def test_other_errors_are_not_reported_as_unmigrated():
+    with pytest.raises(ProgrammingError):
+        await current_revisions(DeniedConnection())
+
+def test_schema_check_setting_is_validated():
+    assert Settings(schema_check="warn").schema_check == "warn"
+    with pytest.raises(ValidationError):
+        Settings(schema_check="strict")
+
+async def test_schema_version_check(alembic_version, caplog):
+    async with Database._engine.begin() as conn:
+        await conn.execute(text("INSERT INTO alembic_version VALUES ('f0c3a9d27b61')"))
+    async with Database._engine.connect() as conn:
+        with caplog.at_level(logging.WARNING):
+            assert await check_schema_version(conn, "warn") is False
+    assert "f0c3a9d27b61" in caplog.text
+
+    async with Database._engine.begin() as conn:
+        await conn.execute(text("UPDATE alembic_version SET version_num = :head"), {"head": head_revisions().pop()})
+    async with Database._engine.connect() as conn:
+        assert await check_schema_version(conn, "error") is True
@@ -1,7 +1,10 @@
 # test_security.py
 from builtins import RuntimeError, ValueError, isinstance, str
 import pytest
-from app.utils.security import hash_password, verify_password
+from app.utils.security import (
+    calibrate_bcrypt_rounds, get_bcrypt_rounds, get_hash_rounds, hash_password, needs_rehash,
+    set_bcrypt_rounds, verify_password,
+)
 
 def test_hash_password():
     """Test that hashing password returns a bcrypt hashed string."""
@@ -65,3 +68,21 @@ def test_hash_password_internal_error(monkeypatch):
     with pytest.raises(ValueError):
         hash_password("test")
 
+def test_hash_password_uses_configured_rounds(monkeypatch):
+    """Test that the default cost factor comes from the active setting."""
+    monkeypatch.setattr("app.utils.security._bcrypt_rounds", 5)
+    assert get_hash_rounds(hash_password("secure_password")) == 5
+
+def test_needs_rehash(monkeypatch):
+    """Test that hashes below the active cost factor are flagged for upgrade."""
+    hashed = hash_password("secure_password", 4)
+    monkeypatch.setattr("app.utils.security._bcrypt_rounds", 4)
+    assert needs_rehash(hashed) is False
+    set_bcrypt_rounds(6)
+    assert needs_rehash(hashed) is True
+    assert needs_rehash("invalid_hash_format") is True
+
+def test_calibrate_bcrypt_rounds_bounds():
+    """Test that calibration stays within the requested range."""
+    assert calibrate_bcrypt_rounds(0, min_rounds=4, max_rounds=8) == 4
+    assert calibrate_bcrypt_rounds(10_000_000, min_rounds=4, max_rounds=8) == 8
@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime, timezone
+import pytest
+from unittest.mock import AsyncMock
+from sqlalchemy import select
+from app.database import Database
+from app.models.email_outbox_model import EmailOutbox, OutboxStatus
+from app.services.email_outbox import OutboxWorker, enqueue_email
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def email_service():
+    service = AsyncMock()
+    service.send_user_email = AsyncMock()
+    return service
+
+async def queue_message(db_session, recipient="queued@example.com"):
+    message = enqueue_email(db_session, recipient, "email_verification", {"name": "Queued", "verification_url": "http://x"})
+    await db_session.commit()
+    return message
+
+async def test_register_user_queues_verification_email(db_session):
+    user_data = {"email": f"outbox_{uuid.uuid4()}@example.com", "password": "ValidPassword123!"}
+    user = await UserService.register_user(db_session, user_data)
+    result = await db_session.execute(select(EmailOutbox).where(EmailOutbox.recipient == user.email))
+    message = result.scalar_one()
+    assert message.status == OutboxStatus.PENDING
+    assert message.email_type == "email_verification"
+    assert f"/verify-email/{user.id}/{user.verification_token}" in message.context["verification_url"]
+
+async def test_worker_delivers_pending_messages(db_session, app_database, email_service):
+    message = await queue_message(db_session)
+    worker = OutboxWorker(email_service, batch_size=10)
+    assert await worker.run_once() == 1
+    email_service.send_user_email.assert_awaited_once()
+    await db_session.refresh(message)
+    assert message.status == OutboxStatus.SENT
+    assert message.sent_at is not None
+    assert await worker.run_once() == 0
+
+async def test_worker_backs_off_then_dead_letters(db_session, app_database, email_service):
+    email_service.send_user_email.side_effect = ConnectionError("SMTP down")
+    message = await queue_message(db_session)
+    worker = OutboxWorker(email_service, max_attempts=2, backoff_base=60)
+
+    await worker.run_once()
+    await db_session.refresh(message)
+    assert message.status == OutboxStatus.PENDING
+    assert message.attempts == 1
+    assert message.last_error == "SMTP down"
+    # Not due again until the backoff has elapsed
+    assert await worker.run_once() == 0
+
+    message.next_attempt_at = message.created_at
+    await db_session.commit()
+    await worker.run_once()
+    await db_session.refresh(message)
+    assert message.status == OutboxStatus.DEAD
+    assert message.attempts == 2
+
+async def test_worker_leases_messages_without_holding_locks_while_sending(db_session, app_database, email_service):
+    message = await queue_message(db_session)
+    seen = {}
+
+    async def send(context, email_type):
+        # The claim is committed: the row can be locked elsewhere and is not due until the lease ends
+        async with Database.get_session_factory()() as other:
+            result = await other.execute(
+                select(EmailOutbox).where(EmailOutbox.id == message.id).with_for_update(nowait=True)
+            )
+            seen["next_attempt_at"] = result.scalar_one().next_attempt_at
+            await other.rollback()
+
+    email_service.send_user_email.side_effect = send
+    worker = OutboxWorker(email_service, lease_seconds=120)
+    assert await worker.run_once() == 1
+    assert (seen["next_attempt_at"] - datetime.now(timezone.utc)).total_seconds() > 60
+    await db_session.refresh(message)
+    assert message.status == OutboxStatus.SENT
+
+async def test_worker_keeps_explicit_zero_settings(email_service):
+    worker = OutboxWorker(email_service, poll_interval=0, backoff_base=0, lease_seconds=0)
+    assert worker.poll_interval == 0
+    assert worker.backoff_base == 0
+    assert worker.lease_seconds == 0
@@ -0,0 +1,30 @@
+from datetime import timedelta
+import pytest
+from app.services import jwt_service
+from app.services.jwt_service import create_access_token, decode_token_cached
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    jwt_service.token_cache.clear()
+    yield
+    jwt_service.token_cache.clear()
+
+def test_repeat_token_skips_verification(monkeypatch):
+    token = create_access_token(data={"sub": "user-1", "role": "admin"}, expires_delta=timedelta(minutes=5))
+    assert decode_token_cached(token)["sub"] == "user-1"
+
+    def fail(token):
+        raise AssertionError("signature should not be re-verified")
+    monkeypatch.setattr(jwt_service, "decode_token", fail)
+    assert decode_token_cached(token)["role"] == "ADMIN"
+
+def test_entry_expires_with_token():
+    token = create_access_token(data={"sub": "user-1"}, expires_delta=timedelta(minutes=5))
+    payload = decode_token_cached(token)
+    key = next(iter(jwt_service.token_cache._entries))
+    expires_at, _ = jwt_service.token_cache._entries[key]
+    assert expires_at <= payload["exp"]
+
+def test_invalid_token_is_not_cached():
+    assert decode_token_cached("not-a-token") is None
+    assert len(jwt_service.token_cache) == 0
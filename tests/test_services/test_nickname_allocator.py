@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import AsyncMock
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.models.user_model import User
+from app.services.nickname_allocator import NicknameAllocator, nickname_allocator
+from app.services.user_service import UserService
+from app.utils.bloom_filter import BloomFilter
+from app.utils.nickname_generator import generate_nickname, nickname_candidates
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def allocator():
+    return NicknameAllocator(BloomFilter(capacity=1000), candidates=4)
+
+def record_queries(db_session, monkeypatch):
+    statements = []
+    execute = db_session.execute
+
+    async def recording_execute(statement, *args, **kwargs):
+        statements.append(statement)
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", recording_execute)
+    return statements
+
+def test_generate_nickname_is_valid():
+    assert generate_nickname("jsmith@example.com") == "jsmith"
+    assert generate_nickname("john.smith+tag@example.com") == "john_smith_tag"
+    assert generate_nickname("al@example.com") == "al_user"
+    assert len(generate_nickname(f"{'x' * 80}@example.com")) == 40
+
+def test_nickname_candidates():
+    candidates = nickname_candidates("jsmith@example.com", 6)
+    assert candidates[0] == "jsmith"
+    assert len(candidates) == 6
+    assert all(candidate.startswith("jsmith_") for candidate in candidates[1:])
+    assert all(len(candidate) <= 50 for candidate in nickname_candidates(f"{'x' * 80}@example.com", 16))
+
+async def test_same_local_part_registers_twice(db_session):
+    first = await UserService.register_user(db_session, {"email": "jsmith@a.com", "password": "Password123!"})
+    second = await UserService.register_user(db_session, {"email": "jsmith@b.com", "password": "Password123!"})
+    assert first.nickname != second.nickname
+    assert first.nickname.startswith("jsmith") and second.nickname.startswith("jsmith_")
+
+async def test_allocate_skips_taken_in_one_query(db_session, allocator, user, monkeypatch):
+    statements = record_queries(db_session, monkeypatch)
+    nickname = await allocator.allocate(db_session, f"{user.nickname}@elsewhere.com")
+    assert nickname.startswith(f"{user.nickname}_")
+    assert len(statements) == 1
+    assert user.nickname in allocator.taken
+
+async def test_allocate_many_gives_distinct_names(db_session, allocator):
+    nicknames = await allocator.allocate_many(db_session, ["sam@a.com", "sam@b.com", "sam@c.com"], reserved={"sam"})
+    assert len(set(nicknames)) == 3
+    assert "sam" not in nicknames
+
+async def test_warm_filter_avoids_lookups(db_session, allocator, users_with_same_role_50_users, monkeypatch):
+    await allocator.warm(db_session)
+    taken = users_with_same_role_50_users[0].nickname
+    assert taken in allocator.taken
+
+    statements = record_queries(db_session, monkeypatch)
+    nickname = await allocator.allocate(db_session, f"{taken}@example.com")
+    assert nickname != taken
+    # The known-taken base name is not even sent to the database
+    looked_up = statements[0].compile().params.values()
+    assert not any(taken in values for values in looked_up if isinstance(values, list))
+
+async def test_exhausted_candidates_fall_back(db_session, allocator):
+    for candidate in ["bob", "bob_1", "bob_2"]:
+        allocator.mark_taken(candidate)
+    allocator.candidates = 1
+    nickname = await allocator.allocate(db_session, "bob@example.com")
+    assert nickname.startswith("bob_") and len(nickname) == len("bob_") + 8
+    assert (await db_session.execute(select(User).where(User.nickname == nickname))).first() is None
+
+async def test_register_retries_when_a_generated_nickname_is_taken_concurrently(db_session, user, monkeypatch):
+    # The first allocation loses the race: another signup inserted the same nickname meanwhile
+    monkeypatch.setattr(nickname_allocator, "allocate", AsyncMock(side_effect=[user.nickname, "second_choice"]))
+    created = await UserService.register_user(db_session, {"email": "racer@example.com", "password": "Password123!"})
+    assert created.nickname == "second_choice"
+
+async def test_register_rejects_a_chosen_nickname_that_is_taken(db_session, user):
+    with pytest.raises(HTTPException) as error:
+        await UserService.register_user(db_session, {"email": "chooser@example.com", "nickname": user.nickname, "password": "Password123!"})
+    assert error.value.detail == "Nickname already exists."
+
@@ -0,0 +1,80 @@
+import uuid
+import pytest
+from app.models.user_model import UserRole
+from app.services.user_autocomplete import user_autocomplete
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+def values(suggestions):
+    return [suggestion["value"] for suggestion in suggestions]
+
+class SnapshotBeforeChanges:
+    """Stands in for a session streaming ``rows``, a snapshot taken before ``changes`` ran."""
+
+    def __init__(self, rows, changes):
+        self.rows = rows
+        self.changes = changes
+
+    async def stream(self, statement):
+        return self
+
+    async def partitions(self):
+        for change in self.changes:
+            change()
+        yield self.rows
+
+async def test_warm_loads_nicknames_and_emails(db_session, users_with_same_role_50_users):
+    assert not user_autocomplete.usable
+    await user_autocomplete.warm(db_session, chunk_rows=7)
+    assert user_autocomplete.usable
+    assert user_autocomplete.stats()["entries"] == 100
+    user = users_with_same_role_50_users[0]
+    assert {"id": user.id.hex, "value": user.nickname} in user_autocomplete.suggest(user.nickname)
+    assert {"id": user.id.hex, "value": user.email} in user_autocomplete.suggest(user.email)
+
+async def test_suggest_returns_one_entry_per_user(db_session):
+    await user_autocomplete.warm(db_session)
+    user = await UserService.register_user(db_session, {"email": "typeahead@example.com", "nickname": "typeahead", "password": "Password123!"})
+    assert user_autocomplete.suggest("type") == [{"id": user.id.hex, "value": "typeahead"}]
+
+async def test_user_service_writes_keep_the_index_current(db_session):
+    await user_autocomplete.warm(db_session)
+    user = await UserService.register_user(db_session, {"email": "before@example.com", "nickname": "before_name", "password": "Password123!"})
+    assert values(user_autocomplete.suggest("before_")) == ["before_name"]
+
+    await UserService.update_user(db_session, user.id, {"nickname": "after_name"})
+    assert user_autocomplete.suggest("before_") == []
+    assert values(user_autocomplete.suggest("after")) == ["after_name"]
+
+    await UserService.update_user_if_unmodified(db_session, user.id, {"email": "later@example.com"}, [user.updated_at])
+    assert user_autocomplete.suggest("before@") == []
+    assert values(user_autocomplete.suggest("later")) == ["later@example.com"]
+
+    await UserService.delete_user(db_session, user.id)
+    assert user_autocomplete.suggest("after") == [] and user_autocomplete.suggest("later") == []
+
+async def test_bulk_delete_removes_users_from_the_index(db_session, users_with_same_role_50_users):
+    await user_autocomplete.warm(db_session)
+    await UserService.bulk_delete_users(db_session, {"role": UserRole.AUTHENTICATED}, chunk_size=20)
+    assert user_autocomplete.stats()["entries"] == 0
+
+async def test_changes_made_during_warm_are_replayed_over_the_snapshot():
+    kept, deleted, renamed, added = (uuid.uuid4() for _ in range(4))
+    snapshot = [
+        (kept, "kept", "kept@example.com"),
+        (deleted, "deleted", "deleted@example.com"),
+        (renamed, "old_name", "renamed@example.com"),
+    ]
+    await user_autocomplete.warm(SnapshotBeforeChanges(snapshot, [
+        lambda: user_autocomplete.remove_user(deleted, "deleted", "deleted@example.com"),
+        lambda: user_autocomplete.replace_user(renamed, ("old_name", "renamed@example.com"), ("new_name", "renamed@example.com")),
+        lambda: user_autocomplete.add_user(added, "added", "added@example.com"),
+    ]))
+    assert user_autocomplete.usable
+    assert user_autocomplete.suggest("deleted") == []
+    assert user_autocomplete.suggest("old") == []
+    assert values(user_autocomplete.suggest("new")) == ["new_name"]
+    assert values(user_autocomplete.suggest("added")) == ["added"]
+    assert user_autocomplete.stats()["entries"] == 6
+
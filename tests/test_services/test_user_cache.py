@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user_model import User
+from app.services.user_autocomplete import user_autocomplete
+from app.services.user_cache import InMemoryUserCacheBackend, UserCache, user_cache
+from app.services.user_service import UserService
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+async def empty_user_cache():
+    await user_cache.clear()
+    yield
+    await user_cache.clear()
+
+class CountingCache(UserCache):
+    def __init__(self):
+        super().__init__(InMemoryUserCacheBackend())
+        self.fetches = 0
+
+    async def _fetch(self, db, key):
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        return await super()._fetch(db, key)
+
+async def test_second_read_is_served_from_cache(db_session, user):
+    cache = CountingCache()
+    first = await cache.get_user(db_session, user.id)
+    db_session.expunge_all()
+    second = await cache.get_user(db_session, user.id)
+    assert cache.fetches == 1
+    assert second.email == first.email
+    assert second in db_session
+
+async def test_concurrent_misses_share_one_fetch(db_session, user):
+    cache = CountingCache()
+    results = await asyncio.gather(*(cache.get_user(db_session, user.id) for _ in range(10)))
+    assert cache.fetches == 1
+    assert all(result.id == user.id for result in results)
+
+async def test_waiters_take_over_a_cancelled_fetch(db_session, user):
+    cache = CountingCache()
+    first = asyncio.create_task(cache.get_user(db_session, user.id))
+    await asyncio.sleep(0)  # first is now fetching
+    waiters = [asyncio.create_task(cache.get_user(db_session, user.id)) for _ in range(3)]
+    await asyncio.sleep(0)  # waiters are now waiting on the shared fetch
+    first.cancel()
+    results = await asyncio.gather(*waiters)
+    assert first.cancelled()
+    assert all(result.id == user.id for result in results)
+    assert cache.fetches == 2
+
+class LaggingReplicaCache(UserCache):
+    """Replica sessions read ``stale`` column values, as a replica behind the primary would."""
+
+    def __init__(self, stale: dict):
+        super().__init__(InMemoryUserCacheBackend())
+        self.stale = stale
+
+    async def _fetch(self, db, key):
+        return User(**self.stale) if db.info.get("replica") else await super()._fetch(db, key)
+
+async def test_replica_reads_do_not_fill_the_cache(db_session, user):
+    cache = LaggingReplicaCache(UserCache._snapshot(user))
+    await db_session.execute(update(User).where(User.id == user.id).values(first_name="Changed"))
+    await db_session.commit()
+    await cache.invalidate(user.id)
+
+    async with AsyncSession(db_session.bind, info={"replica": True}) as replica:
+        assert (await cache.get_user(replica, user.id)).first_name != "Changed"
+    db_session.expunge_all()
+    assert (await cache.get_user(db_session, user.id)).first_name == "Changed"
+
+async def test_missing_user_is_not_cached(db_session):
+    cache = CountingCache()
+    assert await cache.get_user(db_session, "00000000-0000-0000-0000-000000000000") is None
+    assert await cache.get_user(db_session, "00000000-0000-0000-0000-000000000000") is None
+    assert cache.fetches == 2
+
+async def test_update_invalidates_cached_user(db_session, user):
+    await UserService.get_user_by_id(db_session, user.id)
+    await UserService.update_user(db_session, user.id, {"first_name": "Changed"})
+    db_session.expunge_all()
+    assert (await UserService.get_user_by_id(db_session, user.id)).first_name == "Changed"
+
+async def test_cached_user_can_be_updated_and_deleted(db_session, user):
+    await UserService.get_user_by_id(db_session, user.id)
+    db_session.expunge_all()
+    updated = await UserService.update_user(db_session, user.id, {"bio": "From cache"})
+    assert updated.bio == "From cache"
+    db_session.expunge_all()
+    assert await UserService.delete_user(db_session, user.id) is True
+    assert await UserService.get_user_by_id(db_session, user.id) is None
+
+async def test_writers_read_the_stored_row_not_the_cached_one(db_session, user):
+    await UserService.get_user_by_id(db_session, user.id)
+    # Another process renames the user; this process's cached copy still has the old nickname
+    await db_session.execute(update(User).where(User.id == user.id).values(nickname="renamed_elsewhere"))
+    await db_session.commit()
+    db_session.expunge_all()
+    await user_autocomplete.warm(db_session)
+
+    await UserService.update_user(db_session, user.id, {"nickname": "renamed_here"})
+    assert user_autocomplete.suggest("renamed_elsewhere") == []
+    assert [suggestion["value"] for suggestion in user_autocomplete.suggest("renamed_")] == ["renamed_here"]
+
@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.database import Database
+from app.services.user_export import EXPORT_FIELDS, export_users, parse_fields
+
+pytestmark = pytest.mark.asyncio
+
+async def collect(*args, **kwargs) -> str:
+    return "".join([chunk async for chunk in export_users(Database.get_session_factory(), *args, **kwargs)])
+
+def test_parse_fields():
+    assert parse_fields(None) == list(EXPORT_FIELDS)
+    assert parse_fields(" email , nickname") == ["email", "nickname"]
+    with pytest.raises(ValueError):
+        parse_fields("email,hashed_password")
+
+async def test_export_ndjson_in_chunks(app_database, users_with_same_role_50_users):
+    chunks = [chunk async for chunk in export_users(
+        Database.get_session_factory(), "ndjson", ["id", "email", "role"], chunk_rows=20
+    )]
+    assert len(chunks) == 3
+    rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert len(rows) == 50
+    assert set(rows[0]) == {"id", "email", "role"}
+    assert {row["email"] for row in rows} == {user.email for user in users_with_same_role_50_users}
+
+async def test_export_csv_with_updated_filter(app_database, db_session, user, verified_user):
+    user.updated_at = datetime.now(timezone.utc) - timedelta(days=2)
+    await db_session.commit()
+
+    body = await collect("csv", ["email", "created_at"], updated_since=datetime.now(timezone.utc) - timedelta(days=1))
+    rows = list(csv.reader(io.StringIO(body)))
+    assert rows[0] == ["email", "created_at"]
+    assert [row[0] for row in rows[1:]] == [verified_user.email]
+    assert datetime.fromisoformat(rows[1][1]) == verified_user.created_at
+
+    body = await collect("csv", ["email"], updated_before=datetime.now(timezone.utc) - timedelta(days=1))
+    assert body.splitlines() == ["email", user.email]
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy import func, select
+from app.analytics.analytics_service import get_user_retention
+from app.database import Database
+from app.models.email_outbox_model import EmailOutbox
+from app.models.user_model import User, UserRole
+from app.services.user_import import import_jobs, import_users, start_import
+from app.utils.security import verify_password
+
+pytestmark = pytest.mark.asyncio
+
+async def stream(text: str, chunk_size: int = 7):
+    data = text.encode("utf-8")
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+async def count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+async def test_import_csv(db_session):
+    body = (
+        "email,password,nickname,first_name,bio,role\r\n"
+        "ana@example.com,Secret*123,ana_b,Ana,\"Likes \"\"quotes\"\",\ncommas and newlines\",MANAGER\r\n"
+        "ben@example.com,Secret*123,,Ben,,\r\n"
+    )
+    job = await import_users(db_session, stream(body), "csv", batch_size=1)
+    assert job.as_dict()["imported"] == 2
+    assert job.failed == 0
+    assert job.status == "completed"
+
+    ana = (await db_session.execute(select(User).where(User.email == "ana@example.com"))).scalar_one()
+    assert ana.bio == 'Likes "quotes",\ncommas and newlines'
+    assert ana.role == UserRole.MANAGER
+    assert verify_password("Secret*123", ana.hashed_password)
+    ben = (await db_session.execute(select(User).where(User.email == "ben@example.com"))).scalar_one()
+    assert ben.nickname.startswith("ben")
+    assert ben.role == UserRole.AUTHENTICATED
+    assert not ben.email_verified
+
+    assert await count(db_session, EmailOutbox) == 2
+    assert (await get_user_retention(db_session))["total_signups"] == 2
+
+async def test_import_ndjson_reports_bad_rows(db_session, user):
+    lines = [
+        json.dumps({"email": "one@example.com", "password": "Secret*123"}),
+        "{not json",
+        json.dumps({"email": "not-an-email", "password": "Secret*123"}),
+        json.dumps({"email": user.email, "password": "Secret*123"}),
+        json.dumps({"email": "one@example.com", "password": "Secret*123", "nickname": "other"}),
+        json.dumps({"email": "long@example.com", "password": "Secret*123", "first_name": "x" * 200}),
+        "",
+        json.dumps({"email": "two@example.com", "password": "Secret*123"}),
+    ]
+    job = await import_users(db_session, stream("\n".join(lines)), "ndjson")
+    report = job.as_dict()
+    assert report["rows_processed"] == 7
+    assert report["imported"] == 2
+    assert [error["row"] for error in report["errors"]] == [2, 3, 5, 4, 6]
+    assert report["errors"][0]["error"].startswith("Invalid JSON")
+    assert report["errors"][1]["error"].startswith("email:")
+    assert report["errors"][2]["error"] == "Duplicate email in import."
+    assert report["errors"][3]["error"] == "Email already exists."
+    assert "too long" in report["errors"][4]["error"]
+    assert report["rows_per_second"] > 0
+    assert import_jobs[report["id"]] is job
+    assert await count(db_session, User) == 3
+
+async def test_import_rejects_unknown_format(db_session):
+    with pytest.raises(ValueError):
+        await import_users(db_session, stream(""), "xml")
+
+async def test_start_import_returns_before_the_import_runs(app_database, db_session):
+    body = "email,password\nlater@example.com,Secret*123\n"
+    job = await start_import(Database.get_session_factory(), stream(body), "csv")
+    assert job.status == "running"
+    assert job.rows_processed == 0
+    assert import_jobs[str(job.id)] is job
+
+    for _ in range(100):
+        if job.status != "running":
+            break
+        await asyncio.sleep(0.05)
+    assert job.status == "completed"
+    assert job.imported == 1
+    assert await count(db_session, User) == 1
+
@@ -1,32 +1,33 @@
 # tests/test_services/test_user_service.py (Corrected)
 
+import asyncio
 import pytest
 import uuid
-from sqlalchemy import select
+from sqlalchemy import func, select, text
+from app.database import Database
+from app.models.email_outbox_model import EmailOutbox
 from app.models.user_model import User, UserRole
-from app.services.user_service import UserService
+from app.schemas.pagination_schema import CountStrategy
+from app.services import user_service
+from app.services.user_service import USER_RESPONSE_FIELDS, UserService, parse_user_fields
 from app.utils.nickname_generator import generate_nickname
-from unittest.mock import AsyncMock
+from app.utils.security import verify_password
 from fastapi import HTTPException
+from pydantic import ValidationError
+from app.settings.config import Settings
 
 pytestmark = pytest.mark.asyncio
 
-@pytest.fixture
-def email_service():
-    service = AsyncMock()
-    service.send_email_verification = AsyncMock()
-    return service
-
 # --- User Creation Tests ---
 
-async def test_create_user_with_valid_data(db_session, email_service):
+async def test_create_user_with_valid_data(db_session):
     user_data = {
         "nickname": generate_nickname("valid@example.com"),
         "email": f"valid_user_{uuid.uuid4()}@example.com",
         "password": "ValidPassword123!",
         "role": UserRole.ADMIN.name
     }
-    user = await UserService.register_user(db_session, user_data, email_service)
+    user = await UserService.register_user(db_session, user_data)
     assert user is not None
     assert user.email == user_data["email"]
 
@@ -37,7 +38,7 @@ async def test_create_user_with_valid_data(db_session, email_service):
    #     "password": "short"
     # }
     # with pytest.raises(HTTPException):
-     #   await UserService.register_user(db_session, user_data, email_service)
+     #   await UserService.register_user(db_session, user_data)
 
 # --- User Fetching Tests ---
 
@@ -96,29 +97,288 @@ async def test_delete_user_does_not_exist(db_session):
 
 # --- Duplicates ---
 
-async def test_create_user_duplicate_email(db_session, email_service, verified_user):
+async def test_create_user_duplicate_email(db_session, verified_user):
     user_data = {
         "email": verified_user.email,
         "password": "DifferentPass$",
         "nickname": generate_nickname("duplicate@example.com")
     }
     with pytest.raises(HTTPException):
-        await UserService.register_user(db_session, user_data, email_service)
+        await UserService.register_user(db_session, user_data)
 
-async def test_admin_can_update_user_role(db_session, email_service, admin_user):
+async def test_admin_can_update_user_role(db_session, admin_user):
     user_data = {
         "email": f"user_update_role_{uuid.uuid4()}@example.com",
         "password": "StrongPassword123",
         "nickname": generate_nickname("updater@example.com")
     }
-    user = await UserService.register_user(db_session, user_data, email_service)
+    user = await UserService.register_user(db_session, user_data)
     updated_user = await UserService.update_user(db_session, user.id, {"role": "MANAGER"})
     assert updated_user.role.name == "MANAGER"
 
-async def test_register_user_missing_nickname(db_session, email_service):
+async def test_register_user_missing_nickname(db_session):
     user_data = {
         "email": f"nonickname_{uuid.uuid4()}@example.com",
         "password": "Password123!"
     }
-    user = await UserService.register_user(db_session, user_data, email_service)
+    user = await UserService.register_user(db_session, user_data)
     assert user.nickname is not None
+
+async def test_upgrade_password_hash(db_session, app_database, user):
+    old_hash = user.hashed_password
+    upgraded = await UserService.upgrade_password_hash(user.id, "MySuperPassword$1234", old_hash)
+    assert upgraded is True
+    await db_session.refresh(user)
+    assert user.hashed_password != old_hash
+    assert verify_password("MySuperPassword$1234", user.hashed_password)
+
+async def test_upgrade_password_hash_skips_changed_password(db_session, app_database, user):
+    upgraded = await UserService.upgrade_password_hash(user.id, "MySuperPassword$1234", "stale-hash")
+    assert upgraded is False
+
+# --- Listing ---
+
+async def test_list_users_offset(db_session, users_with_same_role_50_users):
+    page = await UserService.list_users(db_session, skip=10, limit=10)
+    assert len(page["items"]) == 10
+    assert page["total"] == 50
+    assert page["page"] == 2
+
+@pytest.mark.parametrize("strategy", [CountStrategy.EXACT, CountStrategy.COUNTER])
+async def test_list_users_exact_counts(db_session, users_with_same_role_50_users, strategy):
+    page = await UserService.list_users(db_session, skip=40, limit=20, count_strategy=strategy)
+    assert page["total"] == 50
+    assert page["total_is_exact"] is True
+    assert page["has_more"] is False
+
+async def test_list_users_counter_tracks_deletes(db_session, users_with_same_role_50_users):
+    await UserService.delete_user(db_session, users_with_same_role_50_users[0].id)
+    total, is_exact = await UserService.count_users(db_session, CountStrategy.COUNTER)
+    assert (total, is_exact) == (49, True)
+
+async def test_list_users_estimated_count(db_session, users_with_same_role_50_users):
+    await db_session.execute(text("ANALYZE users"))
+    page = await UserService.list_users(db_session, limit=10, count_strategy=CountStrategy.ESTIMATED)
+    assert page["total"] == 50
+    assert page["total_is_exact"] is False
+
+async def test_list_users_without_count(db_session, users_with_same_role_50_users):
+    page = await UserService.list_users(db_session, limit=10, count_strategy=CountStrategy.NONE)
+    assert page["total"] is None
+    assert page["has_more"] is True
+
+def test_count_strategy_setting_is_validated():
+    assert Settings(user_count_strategy="estimated").user_count_strategy is CountStrategy.ESTIMATED
+    with pytest.raises(ValidationError):
+        Settings(user_count_strategy="approximate")
+
+async def test_list_users_by_cursor_walks_all_pages(db_session, users_with_same_role_50_users):
+    seen = []
+    page = await UserService.list_users_by_cursor(db_session, None, 15)
+    assert page["prev_cursor"] is None
+    seen.extend(user.id for user in page["items"])
+    while page["next_cursor"]:
+        page = await UserService.list_users_by_cursor(db_session, page["next_cursor"], 15)
+        seen.extend(user.id for user in page["items"])
+    assert len(seen) == len(set(seen)) == 50
+
+    # Walk back from the last page to the first
+    back = await UserService.list_users_by_cursor(db_session, page["prev_cursor"], 15)
+    assert len(back["items"]) == 15
+    assert [user.id for user in back["items"]] == seen[30:45]
+
+async def test_list_users_selects_only_response_columns(db_session, users_with_same_role_50_users):
+    page = await UserService.list_users(db_session, limit=5)
+    assert set(page["items"][0]._fields) == set(USER_RESPONSE_FIELDS)
+    page = await UserService.list_users(db_session, limit=5, fields=parse_user_fields("email"))
+    assert page["items"][0]._fields == ("id", "email")
+
+async def test_parse_user_fields():
+    assert parse_user_fields(None) == USER_RESPONSE_FIELDS
+    assert parse_user_fields("email, id,email") == ("id", "email")
+    with pytest.raises(ValueError):
+        parse_user_fields("email,hashed_password")
+
+async def test_list_users_by_cursor_rejects_garbage(db_session):
+    with pytest.raises(ValueError):
+        await UserService.list_users_by_cursor(db_session, "not-a-cursor", 10)
+
+async def test_list_users_filters(db_session, users_with_same_role_50_users, admin_user):
+    locked = users_with_same_role_50_users[:5]
+    for user in locked:
+        user.is_locked = True
+    await db_session.commit()
+
+    page = await UserService.list_users(db_session, limit=10, filters={"is_locked": True})
+    assert page["total"] == 5
+    assert {row.id for row in page["items"]} == {user.id for user in locked}
+    page = await UserService.list_users(db_session, limit=100, filters={"role": UserRole.ADMIN})
+    assert [row.id for row in page["items"]] == [admin_user.id]
+    page = await UserService.list_users(db_session, limit=100, filters={"created_before": admin_user.created_at})
+    assert page["total"] == 50
+
+async def test_list_users_by_cursor_with_sort_and_filter(db_session, users_with_same_role_50_users):
+    expected = sorted((user.nickname for user in users_with_same_role_50_users), reverse=True)
+    seen = []
+    page = await UserService.list_users_by_cursor(db_session, None, 15, filters={"role": UserRole.AUTHENTICATED}, sort="-nickname")
+    seen.extend(row.nickname for row in page["items"])
+    while page["next_cursor"]:
+        page = await UserService.list_users_by_cursor(db_session, page["next_cursor"], 15, filters={"role": UserRole.AUTHENTICATED}, sort="-nickname")
+        seen.extend(row.nickname for row in page["items"])
+    assert seen == expected
+
+    back = await UserService.list_users_by_cursor(db_session, page["prev_cursor"], 15, filters={"role": UserRole.AUTHENTICATED}, sort="-nickname")
+    assert [row.nickname for row in back["items"]] == expected[30:45]
+    # A cursor only applies to the ordering it came from
+    with pytest.raises(ValueError):
+        await UserService.list_users_by_cursor(db_session, page["prev_cursor"], 15, sort="nickname")
+
+@pytest.mark.parametrize("filters, index", [
+    ({"role": UserRole.MANAGER}, "ix_users_role_created_at_id"),
+    ({"email_verified": False}, "ix_users_unverified_created_at_id"),
+    ({"is_locked": True}, "ix_users_locked_created_at_id"),
+    ({"is_professional": True}, "ix_users_professional_created_at_id"),
+])
+async def test_filtered_listing_is_an_index_range_scan(db_session, monkeypatch, filters, index):
+    statements = []
+    execute = db_session.execute
+
+    async def recording_execute(statement, *args, **kwargs):
+        statements.append(statement)
+        return await execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", recording_execute)
+    await UserService.list_users_by_cursor(db_session, None, 10, filters=filters)
+    sql = statements[0].compile(dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True})
+    # The table is tiny, so rule out whole-table and bitmap scans to see whether an ordered index scan exists
+    await execute(text("SET LOCAL enable_seqscan = off"))
+    await execute(text("SET LOCAL enable_bitmapscan = off"))
+    plan = "\n".join((await execute(text(f"EXPLAIN {sql}"))).scalars())
+    assert index in plan
+    assert "Sort" not in plan
+
+# --- Search ---
+
+def _search_user(nickname, email, first_name=None, last_name=None):
+    return User(nickname=nickname, email=email, first_name=first_name, last_name=last_name,
+                hashed_password="x", role=UserRole.AUTHENTICATED)
+
+async def test_search_users_ranks_exact_and_prefix_matches_first(db_session, users_with_same_role_50_users):
+    db_session.add_all([
+        _search_user("grace_hopper", "grace@navy.example", "Grace", "Hopper"),
+        _search_user("amazing_grace", "admiral@navy.example", "Amazing", "Grace"),
+        _search_user("graceful", "graceful@example.org"),
+    ])
+    await db_session.commit()
+    page = await UserService.search_users(db_session, "grace_hopper")
+    assert page["items"][0].nickname == "grace_hopper"
+
+    page = await UserService.search_users(db_session, "grace")
+    nicknames = [row.nickname for row in page["items"]]
+    assert set(nicknames) >= {"grace_hopper", "amazing_grace", "graceful"}
+    assert nicknames.index("amazing_grace") > nicknames.index("grace_hopper")
+
+async def test_search_users_matches_substrings_and_names(db_session):
+    db_session.add_all([
+        _search_user("ada", "countess@lovelace.example", "Augusta Ada", "King"),
+        _search_user("percent", "100%@example.org"),
+    ])
+    await db_session.commit()
+    assert [row.nickname for row in (await UserService.search_users(db_session, "lovelace"))["items"]] == ["ada"]
+    assert [row.nickname for row in (await UserService.search_users(db_session, "king"))["items"]] == ["ada"]
+    # LIKE wildcards in the query are matched literally
+    assert [row.nickname for row in (await UserService.search_users(db_session, "0%@"))["items"]] == ["percent"]
+
+async def test_search_users_pages_by_rank(db_session):
+    db_session.add_all(_search_user(f"searcher{i:02}", f"searcher{i:02}@example.org") for i in range(25))
+    await db_session.commit()
+    seen = []
+    page = await UserService.search_users(db_session, "searcher", limit=10)
+    seen.extend(row.id for row in page["items"])
+    while page["next_cursor"]:
+        page = await UserService.search_users(db_session, "searcher", limit=10, cursor=page["next_cursor"])
+        seen.extend(row.id for row in page["items"])
+    assert len(seen) == len(set(seen)) == 25
+
+    with pytest.raises(ValueError):
+        await UserService.search_users(db_session, "searcher", cursor="not-a-cursor")
+
+@pytest.fixture
+async def trigram(db_session, monkeypatch):
+    """Install pg_trgm for the test, or skip it where the server does not ship contrib."""
+    available = await db_session.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')"))
+    if not available:
+        pytest.skip("pg_trgm is not available on this server")
+    installed = await db_session.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"))
+    if not installed:
+        await db_session.execute(text("CREATE EXTENSION pg_trgm"))
+        await db_session.commit()
+    monkeypatch.setattr(user_service, "_trigram_available", None)
+    yield
+    if not installed:
+        await db_session.execute(text("DROP EXTENSION pg_trgm"))
+        await db_session.commit()
+
+async def test_search_users_fuzzy_matches_with_trigram(db_session, trigram):
+    db_session.add_all([
+        _search_user("hopper", "admiral@navy.example", "Grace", "Hopper"),
+        _search_user("lovelace", "countess@example.org", "Ada", "King"),
+    ])
+    await db_session.commit()
+    # "hoppr" is neither a substring nor a word of any user; only trigram similarity finds it
+    page = await UserService.search_users(db_session, "hoppr")
+    assert [row.nickname for row in page["items"]] == ["hopper"]
+    assert page["items"][0].rank > 0
+
+async def test_bulk_update_users_by_filter_in_chunks(db_session, users_with_same_role_50_users, admin_user):
+    affected = await UserService.bulk_update_users(
+        db_session, {"role": UserRole.AUTHENTICATED}, {"role": UserRole.MANAGER}, chunk_size=7
+    )
+    assert affected == 50
+    roles = (await db_session.execute(select(User.role).execution_options(populate_existing=True))).scalars().all()
+    assert roles.count(UserRole.MANAGER) == 50
+    assert roles.count(UserRole.ADMIN) == 1
+
+async def test_bulk_update_users_invalidates_cache(db_session, user):
+    cached = await UserService.get_user_by_id(db_session, user.id)
+    assert cached.is_locked is False
+    db_session.expunge_all()
+    assert await UserService.bulk_update_users(db_session, {"ids": [user.id]}, {"is_locked": True}) == 1
+    db_session.expunge_all()
+    assert (await UserService.get_user_by_id(db_session, user.id)).is_locked is True
+
+async def test_bulk_delete_users(db_session, verified_user, unverified_user, users_with_same_role_50_users):
+    assert await UserService.bulk_delete_users(db_session, {"email_verified": True}, chunk_size=10) == 51
+    remaining = (await db_session.execute(select(User.id))).scalars().all()
+    assert remaining == [unverified_user.id]
+
+async def test_bulk_operations_require_filter_and_changes(db_session):
+    with pytest.raises(HTTPException) as exc:
+        await UserService.bulk_delete_users(db_session, {})
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        await UserService.bulk_update_users(db_session, {"is_locked": True}, {})
+
+async def test_register_user_reports_nickname_conflict(db_session, verified_user):
+    user_data = {"email": "fresh@example.com", "password": "Password123!", "nickname": verified_user.nickname}
+    with pytest.raises(HTTPException) as exc:
+        await UserService.register_user(db_session, user_data)
+    assert exc.value.detail == "Nickname already exists."
+    assert await db_session.scalar(select(func.count()).select_from(EmailOutbox)) == 0
+
+async def test_register_user_reports_email_conflict(db_session, verified_user):
+    user_data = {"email": verified_user.email, "password": "Password123!", "nickname": "someone_new"}
+    with pytest.raises(HTTPException) as exc:
+        await UserService.register_user(db_session, user_data)
+    assert exc.value.detail == "Email already exists."
+
+async def test_concurrent_registrations_resolved_by_database(app_database):
+    session_factory = Database.get_session_factory()
+
+    async def register(nickname):
+        async with session_factory() as db:
+            return await UserService.register_user(db, {"email": "race@example.com", "password": "Password123!", "nickname": nickname})
+
+    results = await asyncio.gather(register("racer_one"), register("racer_two"), return_exceptions=True)
+    assert sum(isinstance(result, User) for result in results) == 1
+    assert [result.detail for result in results if isinstance(result, HTTPException)] == ["Email already exists."]
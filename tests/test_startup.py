@@ -0,0 +1,26 @@
+import os
+import pytest
+from app.cli import main, profile_imports
+
+# Wall-clock import time depends on machine load, so the budget is only checked when set
+IMPORT_TIME_BUDGET_MS = os.environ.get("IMPORT_TIME_BUDGET_MS")
+# Only needed once a request uses them, so importing the app must not load them
+DEFERRED_MODULES = {"aiosmtplib", "alembic", "bcrypt", "jwt", "markdown2", "multiprocessing"}
+
+@pytest.mark.slow
+@pytest.mark.skipif(IMPORT_TIME_BUDGET_MS is None, reason="set IMPORT_TIME_BUDGET_MS to check import time")
+def test_app_import_stays_within_budget():
+    timings = profile_imports("app.main")
+    cumulative_ms = next(cumulative for name, _, cumulative in timings if name == "app.main") / 1000
+    assert cumulative_ms < float(IMPORT_TIME_BUDGET_MS), f"importing app.main took {cumulative_ms:.0f} ms"
+
+def test_app_import_defers_optional_libraries():
+    loaded = {name for name, _, _ in profile_imports("app.main")}
+    assert not loaded & DEFERRED_MODULES
+
+def test_startup_profile_lists_slowest_modules(capsys):
+    assert main(["startup-profile", "--module", "app.utils.prefix_index", "--top", "3"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("Importing app.utils.prefix_index took")
+    assert len(lines) == 5
+    assert lines[2].endswith("app.utils.prefix_index")
@@ -0,0 +1,15 @@
+from app.utils.bloom_filter import BloomFilter
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}")
+    assert all(f"user{i}" in bloom for i in range(1000))
+    assert bloom.count == 1000
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}")
+    false_positives = sum(f"other{i}" in bloom for i in range(10000))
+    assert false_positives < 300
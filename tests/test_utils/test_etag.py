@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta, timezone
+from app.utils.etag import etag_matches, etag_version, last_modified, modified_since, version_etag
+
+def test_etag_round_trips_updated_at():
+    updated_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    etag = version_etag(updated_at)
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag_version(etag) == updated_at
+    assert version_etag(updated_at + timedelta(microseconds=1)) != etag
+    assert etag_version('W/' + etag) is None
+    assert etag_version('"not-hex"') is None
+
+def test_etag_matching():
+    etag = '"abc"'
+    assert etag_matches('"xyz", "abc"', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('W/"abc"', etag)
+    assert etag_matches('W/"abc"', etag, weak=True)
+
+def test_modified_since_uses_second_resolution():
+    updated_at = datetime(2024, 5, 1, 12, 30, 15, 999999, tzinfo=timezone.utc)
+    header = last_modified(updated_at)
+    assert header == "Wed, 01 May 2024 12:30:15 GMT"
+    assert not modified_since(header, updated_at)
+    assert modified_since(header, updated_at + timedelta(seconds=1))
+    assert modified_since("garbage", updated_at)
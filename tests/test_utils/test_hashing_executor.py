@@ -0,0 +1,47 @@
+import asyncio
+import time
+import pytest
+from app.utils.hashing_executor import HashingExecutor, HashingQueueFull
+from app.utils.security import hash_password, hash_password_async, verify_password, verify_password_async
+
+@pytest.fixture
+def executor():
+    executor = HashingExecutor(workers=2, max_queue=4)
+    yield executor
+    executor.shutdown()
+
+async def test_run_returns_result(executor):
+    hashed = await executor.run(hash_password, "secure_password", 4)
+    assert verify_password("secure_password", hashed)
+
+async def test_run_propagates_errors(executor):
+    with pytest.raises(ValueError):
+        await executor.run(verify_password, "secure_password", "invalid_hash_format")
+    assert executor.stats()["failed"] == 1
+
+async def test_stats_track_completed_jobs(executor):
+    await asyncio.gather(*(executor.run(hash_password, "pw", 4, wait=True) for _ in range(8)))
+    stats = executor.stats()
+    assert stats["completed"] == 8
+    assert stats["queue_depth"] == 0
+    assert stats["max_latency_ms"] > 0
+
+async def test_run_rejects_when_queue_is_full():
+    executor = HashingExecutor(workers=1, max_queue=0)
+    try:
+        busy = asyncio.create_task(executor.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        with pytest.raises(HashingQueueFull):
+            await executor.run(time.sleep, 0)
+        assert executor.stats()["rejected"] == 1
+        # Background callers queue for the slot instead
+        await executor.run(time.sleep, 0, wait=True)
+        await busy
+        assert executor.stats()["completed"] == 2
+    finally:
+        executor.shutdown()
+
+async def test_async_helpers_roundtrip():
+    hashed = await hash_password_async("secure_password", 4)
+    assert await verify_password_async("secure_password", hashed) is True
+    assert await verify_password_async("wrong_password", hashed) is False
@@ -0,0 +1,58 @@
+import pytest
+import time
+import uuid
+from app.utils.prefix_index import PrefixIndex
+
+def test_prefix_index_search_is_case_insensitive_and_ordered():
+    index = PrefixIndex()
+    index.add("JohnDoe", "1")
+    index.add("john.smith@example.com", "2")
+    index.add("jane@example.com", "3")
+    assert index.search("JOHN") == [("john.smith@example.com", "2"), ("JohnDoe", "1")]
+    assert index.search("johnd", limit=1) == [("JohnDoe", "1")]
+    assert index.search("x") == []
+
+def test_prefix_index_discard_and_add_many():
+    index = PrefixIndex()
+    assert index.add_many([("alpha", "1"), ("beta", "2"), ("alpha", "1")]) == 2
+    assert index.add_many([("alpha", "1"), ("gamma", "3")]) == 1
+    index.discard("beta", "2")
+    index.discard("missing", "9")
+    assert [key for key, _ in index.search("")] == ["alpha", "gamma"]
+    assert len(index) == 2
+
+def test_prefix_index_is_bounded():
+    index = PrefixIndex(max_entries=3)
+    index.add_many((f"user{i}", str(i)) for i in range(2))
+    assert index.complete
+    assert index.add("user2", "2") is True
+    assert index.add("user3", "3") is False
+    assert not index.complete
+    assert len(index) == 3
+    index.clear()
+    assert index.complete and len(index) == 0
+
+def hundred_thousand_users() -> PrefixIndex:
+    index = PrefixIndex()
+    index.add_many(
+        pair for i in range(100000)
+        for pair in ((f"user_{i}", uuid.UUID(int=i).hex), (f"user_{i}@example.com", uuid.UUID(int=i).hex))
+    )
+    return index
+
+def test_prefix_index_memory():
+    index = hundred_thousand_users()
+    # Roughly 100 bytes per entry, two entries per user
+    assert index.memory_bytes() / 100000 * 1000000 < 300 * 1024 * 1024
+
+# Wall-clock bound; deselect with -m "not slow" on shared runners
+@pytest.mark.slow
+def test_prefix_index_lookup_latency():
+    index = hundred_thousand_users()
+    timings = []
+    for i in range(1000):
+        start = time.perf_counter()
+        index.search(f"user_{i * 97}", 10)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    assert timings[989] < 0.001
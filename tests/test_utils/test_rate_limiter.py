@@ -0,0 +1,131 @@
+import json
+import time
+import pytest
+from app.utils.rate_limiter import InMemoryRateLimitStore, RateLimit, RateLimitMiddleware, RateLimitRule
+
+pytestmark = pytest.mark.asyncio
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+async def echo_app(scope, receive, send):
+    message = await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": message.get("body", b"")})
+
+def make_middleware(store=None):
+    rules = {
+        "/login/": RateLimitRule(per_ip=RateLimit(3, 60), per_account=RateLimit(2, 60), account_field="username"),
+        "/register/": RateLimitRule(per_account=RateLimit(1, 60), account_field="email"),
+    }
+    return RateLimitMiddleware(echo_app, rules, store or InMemoryRateLimitStore())
+
+async def call(middleware, path, body=b"", content_type=b"application/x-www-form-urlencoded", ip="10.0.0.1", method="POST"):
+    scope = {
+        "type": "http", "method": method, "path": path, "client": (ip, 1234),
+        "headers": [(b"content-type", content_type)],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    headers = dict(sent[0].get("headers", []))
+    return sent[0]["status"], headers, sent[1]["body"]
+
+async def test_token_bucket_refills():
+    clock = FakeClock()
+    store = InMemoryRateLimitStore(clock=clock)
+    limit = RateLimit(2, 10)
+    assert await store.consume("k", limit) == 0
+    assert await store.consume("k", limit) == 0
+    assert await store.consume("k", limit) == pytest.approx(5.0)
+    clock.now += 5
+    assert await store.consume("k", limit) == 0
+
+async def test_store_evicts_least_recent_keys():
+    store = InMemoryRateLimitStore(max_keys=2)
+    limit = RateLimit(1, 60)
+    for key in ("a", "b", "c"):
+        await store.consume(key, limit)
+    assert await store.consume("a", limit) == 0  # "a" was evicted, so it has a fresh bucket
+
+async def test_per_ip_limit_returns_429():
+    middleware = make_middleware()
+    for i in range(3):
+        status, _, _ = await call(middleware, "/login/", f"username=user{i}".encode())
+        assert status == 200
+    status, headers, body = await call(middleware, "/login/", b"username=user9")
+    assert status == 429
+    assert int(headers[b"retry-after"]) >= 1
+    assert json.loads(body) == {"detail": "Too many requests"}
+    assert (await call(middleware, "/login/", b"username=user9", ip="10.0.0.2"))[0] == 200
+
+async def test_per_account_limit_across_ips():
+    middleware = make_middleware()
+    assert (await call(middleware, "/login/", b"username=Victim%40example.com", ip="1.1.1.1"))[0] == 200
+    assert (await call(middleware, "/login/", b"username=victim@example.com", ip="2.2.2.2"))[0] == 200
+    assert (await call(middleware, "/login/", b"username=victim@example.com", ip="3.3.3.3"))[0] == 429
+
+async def test_json_account_and_body_replayed():
+    middleware = make_middleware()
+    body = json.dumps({"email": "new@example.com", "password": "x"}).encode()
+    status, _, echoed = await call(middleware, "/register/", body, b"application/json")
+    assert status == 200
+    assert echoed == body
+    assert (await call(middleware, "/register/", body, b"application/json"))[0] == 429
+
+async def test_oversized_body_rejected_without_reading_it_all():
+    middleware = make_middleware()
+    middleware.max_body = 1024
+    received = []
+    sent = []
+
+    async def endless_receive():
+        received.append(1)
+        return {"type": "http.request", "body": b"x" * 512, "more_body": True}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/login/", "client": ("10.0.0.1", 1234), "headers": []}
+    await middleware(scope, endless_receive, send)
+    assert sent[0]["status"] == 413
+    assert len(received) == 3
+
+async def test_unlimited_requests_pass_through():
+    middleware = make_middleware()
+    for _ in range(10):
+        assert (await call(middleware, "/users/", b"username=a"))[0] == 200
+        assert (await call(middleware, "/login/", b"username=a", method="GET"))[0] == 200
+
+# Wall-clock bound; deselect with -m "not slow" on shared runners
+@pytest.mark.slow
+async def test_overhead_under_50_microseconds():
+    async def noop_app(scope, receive, send):
+        pass
+
+    rule = RateLimitRule(per_ip=RateLimit(10 ** 9, 1), per_account=RateLimit(10 ** 9, 1), account_field="username")
+    middleware = RateLimitMiddleware(noop_app, {"/login/": rule}, InMemoryRateLimitStore())
+    scope = {
+        "type": "http", "method": "POST", "path": "/login/", "client": ("10.0.0.1", 1234),
+        "headers": [(b"content-type", b"application/x-www-form-urlencoded")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"username=someone%40example.com&password=secret", "more_body": False}
+
+    iterations = 5000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await middleware(scope, receive, None)
+    elapsed = time.perf_counter() - start
+    assert elapsed / iterations < 50e-6
@@ -0,0 +1,68 @@
+import asyncio
+import socket
+import pytest
+from aiosmtpd.controller import Controller
+from app.utils.smtp_connection import SMTPClient
+
+class RecordingHandler:
+    """In-process SMTP stand-in that records delivered messages and client connections."""
+
+    def __init__(self):
+        self.messages = []
+        self.peers = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.peers.add(session.peer)
+        return "250 Message accepted for delivery"
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+@pytest.fixture
+async def smtp_client(smtp_server):
+    controller, _ = smtp_server
+    client = SMTPClient(controller.hostname, controller.port, "sender@example.com", None,
+                        pool_size=2, use_tls=False)
+    yield client
+    await client.close()
+
+async def test_send_email_delivers_message(smtp_server, smtp_client):
+    _, handler = smtp_server
+    await smtp_client.send_email("Hello", "<p>Hi</p>", "user@example.com")
+    assert len(handler.messages) == 1
+    assert handler.messages[0].rcpt_tos == ["user@example.com"]
+
+async def test_connections_are_reused(smtp_server, smtp_client):
+    _, handler = smtp_server
+    for i in range(5):
+        await smtp_client.send_email("Hello", "<p>Hi</p>", f"user{i}@example.com")
+    assert len(handler.messages) == 5
+    assert smtp_client.pool.connections_opened == 1
+    assert len(handler.peers) == 1
+
+async def test_idle_connections_expire(smtp_server, smtp_client):
+    smtp_client.pool.idle_timeout = 0
+    await smtp_client.send_email("Hello", "<p>Hi</p>", "user@example.com")
+    await asyncio.sleep(0.01)
+    await smtp_client.send_email("Hello", "<p>Hi</p>", "user@example.com")
+    assert smtp_client.pool.connections_opened == 2
+
+@pytest.mark.slow
+async def test_bulk_send_throughput(smtp_server, smtp_client):
+    _, handler = smtp_server
+    messages = [("Hello", "<p>Hi</p>", f"user{i}@example.com") for i in range(200)]
+    sent = await smtp_client.send_bulk(messages)
+    assert sent == 200
+    assert len(handler.messages) == 200
+    assert smtp_client.pool.connections_opened <= 2
@@ -0,0 +1,56 @@
+import os
+import markdown2
+import pytest
+from app.utils.template_manager import TemplateManager, get_template_manager
+
+CONTEXT = {"name": "Test User", "verification_url": "http://example.com/verify?token=abc123"}
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / "header.md").write_text("# Header {literal}\n", encoding="utf-8")
+    (tmp_path / "footer.md").write_text("Footer\n", encoding="utf-8")
+    (tmp_path / "greeting.md").write_text("Hello {name}, use {{braces}}.\n", encoding="utf-8")
+    return tmp_path
+
+@pytest.fixture
+def manager(template_dir):
+    manager = TemplateManager()
+    manager.templates_dir = template_dir
+    return manager
+
+def render_uncompiled(manager, template_name, **context):
+    """The original render path: format the Markdown, then convert and style the whole document."""
+    main_content = manager._read_template(f"{template_name}.md").format(**context)
+    full_markdown = f"{manager._read_template('header.md')}\n{main_content}\n{manager._read_template('footer.md')}"
+    return manager._apply_email_styles(markdown2.markdown(full_markdown))
+
+def test_compiled_render_matches_markdown_render():
+    manager = TemplateManager()
+    assert manager.render_template("email_verification", **CONTEXT) == render_uncompiled(manager, "email_verification", **CONTEXT)
+
+def test_literal_braces_survive(manager):
+    html = manager.render_template("greeting", name="Ada")
+    assert "Header {literal}" in html
+    assert "Hello Ada, use {braces}." in html
+
+def test_markdown_runs_once_per_template(manager, monkeypatch):
+    calls = []
+    original = markdown2.markdown
+    monkeypatch.setattr(markdown2, "markdown", lambda text: calls.append(text) or original(text))
+    for name in ("Ada", "Grace", "Linus"):
+        assert f"Hello {name}" in manager.render_template("greeting", name=name)
+    assert len(calls) == 1
+
+def test_changed_template_is_recompiled(manager, template_dir):
+    manager.render_template("greeting", name="Ada")
+    path = template_dir / "greeting.md"
+    path.write_text("Goodbye {name}\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert "Goodbye Ada" in manager.render_template("greeting", name="Ada")
+
+def test_context_values_are_escaped(manager):
+    assert "Hello &lt;b&gt;Ada&lt;/b&gt;" in manager.render_template("greeting", name="<b>Ada</b>")
+
+def test_template_manager_is_shared():
+    assert get_template_manager() is get_template_manager()